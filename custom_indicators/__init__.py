@@ -0,0 +1,17 @@
+from .cache import IndicatorCache, indicator_cache, candles_key, shared, timeframe_cached
+from .candlestick_patterns import candlestick_patterns, ENGULFING_1_BULL, ENGULFING_1_BEAR, ENGULFING_2_BULL, ENGULFING_2_BEAR, \
+    PINBAR_BULL, PINBAR_BEAR, MARUBOZU_BULL, MARUBOZU_BEAR, ENGULFING_BULL, ENGULFING_BEAR, BULL, BEAR, engulfing_direction, pinbar_direction
+from .deriv import deriv
+from .engulfing import engulfing
+from .ha import ha
+from .has import has
+from .levels import LevelDetector, Zone
+from .marubozu import marubozu
+from .pinbar import pinbar
+from .running_metrics import RunningMetrics
+from .streaming import StreamingIndicator, HaStream, HasStream, DerivStream, PatternsStream, EngulfingStream, PinbarStream, \
+    MarubozuStream, LowStream, HighStream
+from .timeframes import TimeframeAggregator, aggregate, aggregate_all, candle_start
+from .tools import last_signal, last_signal_in_range, low, pivotlow, high, pivothigh, zoom_timeframe, risk_to_qty, risk_to_size, size_to_qty
+from .vectorized_backtest import vectorized_backtest, VectorizedBacktest
+from .zone_index import ZoneIndex
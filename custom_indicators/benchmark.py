@@ -0,0 +1,163 @@
+"""
+Benchmarks of the custom indicators on synthetic candles, in sequential, non sequential and streaming modes.
+
+    python -m custom_indicators.benchmark --output before.json
+    python -m custom_indicators.benchmark --output after.json --compare before.json
+
+Each result reports the best wall time over the repeats, after a warm-up call that keeps numba's
+compilation out of the timings, the throughput and the peak memory allocated during one call
+(tracemalloc, which also tracks NumPy's buffers). The throughput is in candles per second for the
+sequential and streaming modes, which process every candle, and in calls per second for the
+non sequential mode, which only reads the trailing window of the candles.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from . import kernels
+from .candlestick_patterns import candlestick_patterns
+from .deriv import deriv
+from .engulfing import engulfing
+from .ha import ha
+from .has import has
+from .marubozu import marubozu
+from .pinbar import pinbar
+from .streaming import HaStream, HasStream, DerivStream, EngulfingStream, PinbarStream, MarubozuStream, LowStream, HighStream
+from .tools import high, low, last_signal_in_range
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+def synthetic_candles(size: int, seed: int = 0) -> np.ndarray:
+    """ random walk candles: timestamp, open, close, high, low, volume """
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.002, size)))
+    open = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open, close) * (1 + np.abs(rng.normal(0, 0.001, size)))
+    low = np.minimum(open, close) * (1 - np.abs(rng.normal(0, 0.001, size)))
+    timestamp = 1_600_000_000_000 + 60_000 * np.arange(size)
+    return np.column_stack((timestamp, open, close, high, low, rng.random(size) * 100))
+
+def cases(candles: np.ndarray) -> dict:
+    """ name -> (sequential, non sequential, streaming factory and its input) """
+    close = candles[:, 2]
+    signal = close > high(close, 20, 0, sequential=True) * 0.999
+
+    return {
+        'ha': (lambda: ha(candles, sequential=True), lambda: ha(candles), (HaStream, candles)),
+        'has': (lambda: has(candles, sequential=True), lambda: has(candles), (HasStream, candles)),
+        'deriv': (lambda: deriv(close, sequential=True), lambda: deriv(close), (DerivStream, close)),
+        'engulfing': (lambda: engulfing(candles, sequential=True), lambda: engulfing(candles), (EngulfingStream, candles)),
+        'pinbar': (lambda: pinbar(candles, sequential=True), lambda: pinbar(candles), (PinbarStream, candles)),
+        'marubozu': (lambda: marubozu(candles, sequential=True), lambda: marubozu(candles), (MarubozuStream, candles)),
+        'candlestick_patterns': (lambda: candlestick_patterns(candles, sequential=True), lambda: candlestick_patterns(candles), None),
+        'high(20)': (lambda: high(candles, 20, sequential=True), lambda: high(candles, 20), (lambda: HighStream(20), candles)),
+        'low(200, -2)': (lambda: low(close, 200, -2, sequential=True), lambda: low(close, 200, -2), (lambda: LowStream(200, -2), close)),
+        'last_signal_in_range': (lambda: last_signal_in_range(close, signal, 1, 12), None, None),
+    }
+
+def measure(func, size: int, repeat: int) -> dict:
+    """ size is the number of candles processed by one call, None when only a trailing window is """
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    seconds = min(times)
+    rate = lambda count: count / seconds if seconds else float('inf')
+    return {'seconds': seconds, 'calls_per_second': rate(1), 'candles_per_second': None if size is None else rate(size), 'peak_memory': peak}
+
+def run(sizes=SIZES, repeat: int = 3, max_streaming_size: int = 100_000, only: list = None) -> dict:
+    """
+    Parameters
+    ----------
+    sizes : list of int - number of candles
+    repeat : int - timings per measure, the best one is kept
+    max_streaming_size : int - streaming runs a python loop per candle, skipped above this size
+    only : list of str - names of the indicators to run, all if None
+
+    Returns
+    -------
+    dict - meta data and the list of results, JSON serializable
+    """
+    results = []
+    for size in sizes:
+        candles = synthetic_candles(size)
+        for name, (sequential, current, streaming) in cases(candles).items():
+            if only and name not in only:
+                continue
+            modes = {'sequential': sequential, 'non-sequential': current}
+            if streaming is not None and size <= max_streaming_size:
+                factory, inputs = streaming
+                modes['streaming'] = lambda: factory().warmup(inputs)
+
+            for mode, func in modes.items():
+                if func is None:
+                    continue
+                result = {'indicator': name, 'mode': mode, 'size': size, **measure(func, None if mode == 'non-sequential' else size, repeat)}
+                results.append(result)
+                throughput = f"{result['calls_per_second']:>16,.0f} calls/s  " if result['candles_per_second'] is None else f"{result['candles_per_second']:>16,.0f} candles/s"
+                print(f"{name:<22} {mode:<15} {size:>9,} {throughput} {result['peak_memory'] / 2**20:>9.2f} MiB", file=sys.stderr)
+
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'backend': kernels.get_backend(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """ results that are slower, or use more memory, than the baseline by more than threshold (relative) """
+    key = lambda r: (r['indicator'], r['mode'], r['size'])
+    before = {key(r): r for r in baseline['results']}
+
+    regressions = []
+    for r in current['results']:
+        b = before.get(key(r))
+        if b is None:
+            continue
+        speed = b['seconds'] / r['seconds'] if r['seconds'] else float('inf')
+        memory = r['peak_memory'] / b['peak_memory'] if b['peak_memory'] else 1
+        if speed < 1 - threshold or memory > 1 + threshold:
+            regressions.append({**r, 'speed_ratio': speed, 'memory_ratio': memory})
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark the custom indicators')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-streaming-size', type=int, default=100_000)
+    parser.add_argument('--only', nargs='+')
+    parser.add_argument('--output', help='path of the JSON results')
+    parser.add_argument('--compare', help='path of the JSON results of a previous run to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.max_streaming_size, args.only)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for r in regressions:
+            print(f"regression: {r['indicator']} {r['mode']} {r['size']:,} candles - speed x{r['speed_ratio']:.2f}, memory x{r['memory_ratio']:.2f}")
+        sys.exit(1 if regressions else 0)
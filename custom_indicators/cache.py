@@ -0,0 +1,123 @@
+"""
+Process-wide memo layer shared by every route, so identical indicator computations
+at the same candle run once no matter how many strategies or properties ask for them.
+"""
+
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class IndicatorCache:
+    """
+    bounded LRU dict of indicator results with hit/miss counters. Results can be grouped by the
+    version of their input, those of a group are evicted as soon as a newer version is requested
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        # group -> (version, keys)
+        self._groups = {}
+    
+    def get(self, key, compute, group=None):
+        """
+        Parameters
+        ----------
+        key : hashable - must identify the candles and the parameters of the computation
+        compute : callable - called without arguments on a miss
+        group : tuple - (group, version), the results of the other versions of the group are evicted
+
+        Returns
+        -------
+        the cached result of compute, shared with every caller of the same key: do not modify it in place
+        """
+        if group is not None:
+            self._track(key, *group)
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            result = self._results[key] = compute()
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        else:
+            self.hits += 1
+            self._results.move_to_end(key)
+        return result
+    
+    def _track(self, key, group, version) -> None:
+        current = self._groups.get(group)
+        if current is None or current[0] != version:
+            if current is not None:
+                for k in current[1]:
+                    self._results.pop(k, None)
+            current = self._groups[group] = version, set()
+        current[1].add(key)
+    
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._results))
+    
+    def clear(self) -> None:
+        self._results.clear()
+        self._groups.clear()
+        self.hits = 0
+        self.misses = 0
+
+indicator_cache = IndicatorCache()
+
+def candles_key(exchange: str, symbol: str, timeframe: str, candles):
+    """ identity of a candles array: its route and its last candle, which still changes while it is being formed """
+    return exchange, symbol, timeframe, len(candles), tuple(candles[-1]) if len(candles) else None
+
+def shared(exchange: str, symbol: str, timeframe: str, candles, func, *args, **kwargs):
+    """
+    func(candles, *args, **kwargs) through indicator_cache
+    
+    Parameters
+    ----------
+    exchange, symbol, timeframe : str - route of the candles
+    candles : np.ndarray
+    func : callable - jesse or custom indicator, taking the candles as first argument
+    args, kwargs : hashable parameters of func
+
+    """
+    candles_id = candles_key(exchange, symbol, timeframe, candles)
+    key = candles_id + (func, args, tuple(sorted(kwargs.items())))
+    # the results of the route's previous candles are never asked again, nor kept: sequential ones are full-history arrays
+    return indicator_cache.get(key, lambda: func(candles, *args, **kwargs), group=(candles_id[:3], candles_id[3:]))
+
+def timeframe_cached(timeframe):
+    """
+    Memoizes a strategy's property on the candles of the timeframe it depends on: the value is
+    recomputed when a candle of that timeframe starts or when the one being formed is updated,
+    and reused by every other access, so it always equals the uncached property.
+    
+        @property
+        @timeframe_cached(lambda self: utils.anchor_timeframe(self.timeframe))
+        def anchor_st(self):
+            ...
+    
+    Parameters
+    ----------
+    timeframe : str | callable - timeframe, or function of the strategy returning it
+    
+    """
+    def decorator(method):
+        @wraps(method)
+        def decorated(self):
+            # counted in the indicator invocations of an instrumented strategy, see Strategy.timings
+            timings = getattr(self, '_timings', None)
+            if timings is not None:
+                timings.indicators[method.__name__] += 1
+            tf = timeframe(self) if callable(timeframe) else timeframe
+            # the forming candle keeps its timestamp for the whole period, its values are part of the key
+            key = candles_key(self.exchange, self.symbol, tf, self.get_candles(self.exchange, self.symbol, tf))
+            cache = self.__dict__.setdefault('_timeframe_cache', {})
+            if method not in cache or cache[method][0] != key:
+                cache[method] = key, method(self)
+            return cache[method][1]
+        return decorated
+    return decorator
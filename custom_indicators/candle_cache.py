@@ -0,0 +1,142 @@
+"""
+On-disk candle cache: a directory per exchange, symbol and timeframe holding one .npy file per column,
+opened memory mapped, and a sparse index of the timestamps.
+
+    cache = CandleCache('storage/candles')
+    cache.append('Binance', 'BTC-USDT', '1m', candles)   # only the candles after the last cached one are written
+    cache.get_candles('Binance', 'BTC-USDT', '1m', start, finish)
+
+A date range is located with the index (every INDEX_STEP-th timestamp, loaded in memory) then a binary
+search in one block of the timestamps, and only the rows of the range are read from the disk.
+Appending writes the new rows at the end of each column and rewrites its header, never the existing rows.
+"""
+
+import io
+import os
+
+import numpy as np
+from numpy.lib import format as npy
+
+COLUMNS = ('timestamp', 'open', 'close', 'high', 'low', 'volume')
+INDEX_STEP = 4096
+
+def _append_column(path: str, count: int, values: np.ndarray) -> None:
+    """ writes values after the first count rows of a 1-D float64 .npy file in place, and its new length in the header """
+    with open(path, 'r+b') as f:
+        version = npy.read_magic(f)
+        read_header, write_header = {
+            (1, 0): (npy.read_array_header_1_0, npy.write_array_header_1_0),
+            (2, 0): (npy.read_array_header_2_0, npy.write_array_header_2_0),
+        }[version]
+        read_header(f)
+        offset = f.tell()
+
+        header = io.BytesIO()
+        write_header(header, {'descr': '<f8', 'fortran_order': False, 'shape': (count + len(values),)})
+        if len(header.getvalue()) != offset:
+            # numpy < 1.23 does not leave room in the header for the length to grow
+            raise OSError(f'{path}: the header of the .npy file cannot grow in place')
+
+        f.seek(offset + count * 8)
+        f.write(np.ascontiguousarray(values, dtype='<f8').tobytes())
+        f.truncate()
+
+        # the header is written last, a crash before leaves the previous length valid
+        f.seek(0)
+        f.write(header.getvalue())
+
+class CandleCache:
+    """ memory mapped columnar candles under root/exchange/symbol/timeframe """
+
+    def __init__(self, root: str = 'storage/candles') -> None:
+        self.root = root
+        # key -> (dict of memory mapped columns, timestamps index)
+        self._opened = {}
+
+    def _path(self, exchange: str, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, exchange, symbol, timeframe)
+
+    def _open(self, exchange: str, symbol: str, timeframe: str) -> tuple:
+        key = (exchange, symbol, timeframe)
+        if key not in self._opened:
+            path = self._path(*key)
+            if not os.path.exists(os.path.join(path, 'index.npy')):
+                return None, None
+            columns = {c: np.load(os.path.join(path, f'{c}.npy'), mmap_mode='r') for c in COLUMNS}
+            # the timestamps are appended last, rows of the other columns beyond them were interrupted
+            columns = {c: column[:len(columns['timestamp'])] for c, column in columns.items()}
+            self._opened[key] = columns, np.load(os.path.join(path, 'index.npy'))
+        return self._opened[key]
+
+    def count(self, exchange: str, symbol: str, timeframe: str) -> int:
+        columns, _ = self._open(exchange, symbol, timeframe)
+        return 0 if columns is None else len(columns['timestamp'])
+
+    def last_timestamp(self, exchange: str, symbol: str, timeframe: str) -> float:
+        """ timestamp of the last cached candle, None if there is none """
+        columns, _ = self._open(exchange, symbol, timeframe)
+        return None if columns is None or not len(columns['timestamp']) else float(columns['timestamp'][-1])
+
+    @staticmethod
+    def _locate(timestamps: np.ndarray, index: np.ndarray, timestamp: float, side: str) -> int:
+        """ np.searchsorted(timestamps, timestamp, side) reading one block of the timestamps only """
+        block = np.searchsorted(index, timestamp, side)
+        low, high = max(block - 1, 0) * INDEX_STEP, min(block * INDEX_STEP, len(timestamps))
+        return low + int(np.searchsorted(timestamps[low:high], timestamp, side))
+
+    def get_candles(self, exchange: str, symbol: str, timeframe: str, start: float = None, finish: float = None) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        start : float - timestamp of the first candle, included, from the first cached one if None
+        finish : float - timestamp of the last candle, included, to the last cached one if None
+
+        Returns
+        -------
+        np.ndarray - the candles of the range, empty if nothing is cached
+        """
+        columns, index = self._open(exchange, symbol, timeframe)
+        if columns is None:
+            return np.empty((0, len(COLUMNS)))
+
+        timestamps = columns['timestamp']
+        first = 0 if start is None else self._locate(timestamps, index, start, 'left')
+        last = len(timestamps) if finish is None else self._locate(timestamps, index, finish, 'right')
+        return np.column_stack([columns[c][first:last] for c in COLUMNS]) if last > first else np.empty((0, len(COLUMNS)))
+
+    def append(self, exchange: str, symbol: str, timeframe: str, candles: np.ndarray) -> int:
+        """
+        Adds the candles that are newer than the last cached one
+
+        Returns
+        -------
+        int - number of candles written
+        """
+        candles = np.asarray(candles, dtype=np.float64)
+        if len(candles) == 0:
+            return 0
+        candles = candles[np.argsort(candles[:, 0], kind='stable')]
+        last = self.last_timestamp(exchange, symbol, timeframe)
+        if last is not None:
+            candles = candles[candles[:, 0] > last]
+        if len(candles) == 0:
+            return 0
+
+        path = self._path(exchange, symbol, timeframe)
+        count = self.count(exchange, symbol, timeframe)
+        # the memory maps are closed before the files change
+        self._opened.pop((exchange, symbol, timeframe), None)
+        if last is None:
+            os.makedirs(path, exist_ok=True)
+            for i, c in enumerate(COLUMNS):
+                np.save(os.path.join(path, f'{c}.npy'), np.ascontiguousarray(candles[:, i]))
+        else:
+            # the timestamps last, they define the length of the cache
+            for i, c in reversed(list(enumerate(COLUMNS))):
+                _append_column(os.path.join(path, f'{c}.npy'), count, candles[:, i])
+
+        # the index is a few KB even for years of 1m candles, it is rewritten
+        timestamps = np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='r')
+        np.save(os.path.join(path, 'index.npy'), np.array(timestamps[::INDEX_STEP]))
+        del timestamps
+        return len(candles)
@@ -0,0 +1,88 @@
+import numpy as np
+
+from jesse.helpers import slice_candles
+
+# one bit per pattern and direction
+ENGULFING_1_BULL = 1 << 0
+ENGULFING_1_BEAR = 1 << 1
+ENGULFING_2_BULL = 1 << 2
+ENGULFING_2_BEAR = 1 << 3
+PINBAR_BULL      = 1 << 4
+PINBAR_BEAR      = 1 << 5
+MARUBOZU_BULL    = 1 << 6
+MARUBOZU_BEAR    = 1 << 7
+
+ENGULFING_BULL = ENGULFING_1_BULL | ENGULFING_2_BULL
+ENGULFING_BEAR = ENGULFING_1_BEAR | ENGULFING_2_BEAR
+BULL = ENGULFING_BULL | PINBAR_BULL | MARUBOZU_BULL
+BEAR = ENGULFING_BEAR | PINBAR_BEAR | MARUBOZU_BEAR
+
+def candlestick_patterns(candles: np.ndarray, engulfing_size: float = 0.5, pinbar_sensivity: float = 0.5, pinbar_wick: float = 60,
+                         marubozu_body: float = 0.1, marubozu_sensivity: float = 0, sequential: bool = False):
+    """
+    Engulfing, pinbar and marubozu candlestick patterns scanned in one pass over the candles
+    
+    Parameters
+    ----------
+    candles : np.ndarray 
+    engulfing_size : float - minimum relative body size of the engulfing candle in %
+    pinbar_sensivity : float - minimum relative size of the pinbar candle in %
+    pinbar_wick : float - miminum size of the pinbar wick relative to the size of the candle in %
+    marubozu_body : float - minimum relative body size of the marubozu candle in %
+    marubozu_sensivity : float - maximum relative size of the marubozu closing wick in %
+    sequential : bool - for faster computations
+
+    Returns
+    -------
+    int | np.ndarray - bitmask of the patterns printed by the candle, see the module constants
+    """
+    candles = slice_candles(candles, sequential)
+    if not sequential:
+        # only the last three candles are needed for the current value
+        candles = candles[-3:]
+
+    open, close, high, low = candles[:, 1], candles[:, 2], candles[:, 3], candles[:, 4]
+    mask = np.zeros(len(candles), dtype=int)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # single candle patterns
+        amplitude = high - low
+        top_wick = high - np.maximum(open, close)
+        bottom_wick = np.minimum(open, close) - low
+        big_pin = amplitude / low > pinbar_sensivity / 100
+        
+        mask |= np.where((top_wick / amplitude > pinbar_wick / 100) & big_pin, PINBAR_BULL, 0)
+        mask |= np.where((bottom_wick / amplitude > pinbar_wick / 100) & big_pin, PINBAR_BEAR, 0)
+        mask |= np.where((open < close) & ((close - open) / open >= marubozu_body / 100) & ((high - close) / close <= marubozu_sensivity / 100), MARUBOZU_BULL, 0)
+        mask |= np.where((open > close) & ((open - close) / open >= marubozu_body / 100) & ((close - low) / close <= marubozu_sensivity / 100), MARUBOZU_BEAR, 0)
+        
+        # right candle engulfing the left one, shifted views instead of copies
+        o, c = open[1:], close[1:]
+        last_open, last_close, last_high, last_low = open[:-1], close[:-1], high[:-1], low[:-1]
+        
+        mask[1:] |= np.where((last_open >= last_close) & (c >= last_high) & (last_close >= o) & ((c - o) / o > engulfing_size / 100), ENGULFING_1_BULL, 0)
+        mask[1:] |= np.where((last_open <= last_close) & (c <= last_low) & (last_close <= o) & ((o - c) / o > engulfing_size / 100), ENGULFING_1_BEAR, 0)
+        
+        # right candle engulfing the two left ones
+        c = close[2:]
+        last_open, last_close = open[1:-1], close[1:-1]
+        prev_open, prev_close, prev_high, prev_low = open[:-2], close[:-2], high[:-2], low[:-2]
+        
+        mask[2:] |= np.where((prev_open >= prev_close) & (c >= prev_high) & (last_open <= last_close) & ((c - prev_open) / prev_open > engulfing_size / 100), ENGULFING_2_BULL, 0)
+        mask[2:] |= np.where((prev_open <= prev_close) & (c <= prev_low) & (last_open >= last_close) & ((prev_open - c) / prev_open > engulfing_size / 100), ENGULFING_2_BEAR, 0)
+
+    if sequential:
+        return mask
+    else:
+        return int(mask[-1])
+
+def engulfing_direction(mask: int) -> int:
+    """ 1 bullish, -1 bearish, 0 none, with the priority of engulfing(): one engulfed candle before two """
+    for bit, direction in ((ENGULFING_1_BULL, 1), (ENGULFING_1_BEAR, -1), (ENGULFING_2_BULL, 1), (ENGULFING_2_BEAR, -1)):
+        if mask & bit:
+            return direction
+    return 0
+
+def pinbar_direction(mask: int) -> int:
+    """ 1 bullish, -1 bearish, 0 none, with the priority of pinbar(): bullish first """
+    return 1 if mask & PINBAR_BULL else -1 if mask & PINBAR_BEAR else 0
@@ -37,7 +37,7 @@ def has(candles: np.ndarray, len1: int = 12, len2: int = 3, sequential: bool = F
     l = talib.EMA(low, len1)
 
     haclose = (o+h+l+c)/4
-    haopen = (np_shift(o, 1, candles[0, 1]) + np_shift(c, 1, candles[0, 2])) / 2
+    haopen = (np_shift(o, 1, np.nan) + np_shift(c, 1, np.nan)) / 2
     hahigh = np.maximum(h, np.maximum(haopen, haclose))
     halow = np.minimum(l, np.minimum(haopen, haclose))
 
@@ -0,0 +1,229 @@
+"""
+Compute kernels behind the hot loops of the custom indicators, with two backends:
+
+numpy : the reference implementation
+numba : the same kernels compiled as plain loops, used when numba is installed
+
+The backend is chosen with the CUSTOM_INDICATORS_BACKEND environment variable ('numpy' or 'numba',
+defaults to numba when it is installed) or at runtime with set_backend().
+Both backends are checked against each other by tests/test_kernels.py, or by hand with
+`python -m custom_indicators.kernels`.
+"""
+
+import os
+import warnings
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ('numpy', 'numba')
+
+'''
+NumPy
+'''
+
+def _numpy_rolling_extremum(array, start, future, is_max):
+    """ van Herk / Gil-Werman block decomposition: prefix/suffix accumulate over window-sized blocks """
+    ufunc = np.maximum if is_max else np.minimum
+    width = future - start + 1
+    left = max(0, -start)
+    padded = np.concatenate((np.zeros(left, dtype=array.dtype), array, np.zeros(max(0, future), dtype=array.dtype)))
+
+    if width == 1:
+        windows = padded
+    else:
+        size = len(padded)
+        blocks = np.pad(padded, (0, -size % width), mode='edge').reshape(-1, width)
+        prefix = ufunc.accumulate(blocks, axis=1).ravel()
+        suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        windows = ufunc(suffix[:size - width + 1], prefix[width - 1:size])
+    return windows[left + start: left + start + len(array)]
+
+def _numpy_last_signal(osc, signal, range_down, range_up):
+    """ forward filled index of the last signal, looked up range_down candles back """
+    n = len(signal)
+    result = np.full((2, n), np.nan)
+    if range_down >= n:
+        return result
+
+    last = np.maximum.accumulate(np.where(signal, np.arange(n), -1))[:n - range_down]
+    distance = np.arange(range_down, n) - last
+    found = (last >= 0) & (distance < range_up)
+
+    result[0, range_down:] = np.where(found, distance, np.nan)
+    result[1, range_down:] = np.where(found, osc[np.maximum(last, 0)], np.nan)
+    return result
+
+def _numpy_deriv(osc):
+    n = len(osc)
+    s1, s2, s3 = (np.concatenate((np.zeros(min(i, n)), osc[:max(n - i, 0)])) for i in (1, 2, 3))
+    return ((osc - s1) / osc,
+            (osc - 2*s1 + s2) / osc,
+            (osc - 3*s1 + 3*s2 - s3) / osc,
+            (osc - s2) / (2 * osc),
+            (osc - s3) / (3 * osc))
+
+'''
+Numba
+'''
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _numba_rolling_extremum(array, start, future, is_max):
+        """ monotonic deque of indices, out of range values count as 0 """
+        n = len(array)
+        out = np.empty(n)
+        queue = np.empty(n, dtype=np.int64)
+        head, tail, pushed, last_nan = 0, 0, 0, -1
+        for t in range(n):
+            first, last = t + start, t + future
+            while pushed <= min(last, n - 1):
+                value = array[pushed]
+                if np.isnan(value):
+                    last_nan = pushed
+                else:
+                    while tail > head and ((array[queue[tail - 1]] <= value) if is_max else (array[queue[tail - 1]] >= value)):
+                        tail -= 1
+                    queue[tail] = pushed
+                    tail += 1
+                pushed += 1
+            while tail > head and queue[head] < first:
+                head += 1
+
+            if last_nan >= 0 and first <= last_nan:
+                out[t] = np.nan
+            elif tail == head:
+                out[t] = 0.
+            else:
+                out[t] = array[queue[head]]
+                if first < 0 or last >= n:
+                    out[t] = max(out[t], 0.) if is_max else min(out[t], 0.)
+        return out
+
+    @numba.njit(cache=True)
+    def _numba_last_signal(osc, signal, range_down, range_up):
+        n = len(signal)
+        result = np.full((2, n), np.nan)
+        last = -1
+        for t in range(range_down, n):
+            if signal[t - range_down]:
+                last = t - range_down
+            if last >= 0 and t - last < range_up:
+                result[0, t] = t - last
+                result[1, t] = osc[last]
+        return result
+
+    @numba.njit(cache=True)
+    def _numba_deriv(osc):
+        n = len(osc)
+        d1, d2, d3, d, tr = np.empty(n), np.empty(n), np.empty(n), np.empty(n), np.empty(n)
+        s1, s2, s3 = 0., 0., 0.
+        for t in range(n):
+            x = osc[t]
+            d1[t] = (x - s1) / x
+            d2[t] = (x - 2*s1 + s2) / x
+            d3[t] = (x - 3*s1 + 3*s2 - s3) / x
+            d[t] = (x - s2) / (2 * x)
+            tr[t] = (x - s3) / (3 * x)
+            s1, s2, s3 = x, s1, s2
+        return d1, d2, d3, d, tr
+
+'''
+Dispatch
+'''
+
+_backend = None
+
+def set_backend(name: str) -> None:
+    """ 'numpy' or 'numba' """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f'backend should be one of {BACKENDS}. You passed {name}')
+    if name == 'numba' and numba is None:
+        raise ImportError('the numba backend requires numba to be installed')
+    _backend = name
+
+def get_backend() -> str:
+    return _backend
+
+def rolling_extremum(array: np.ndarray, start: int, future: int, is_max: bool) -> np.ndarray:
+    """ max or min of array[t + start: t + future + 1] for every t, out of range values counting as 0 """
+    if _backend == 'numba' and array.dtype == np.float64:
+        return _numba_rolling_extremum(array, start, future, is_max)
+    return _numpy_rolling_extremum(array, start, future, is_max)
+
+def last_signal(osc: np.ndarray, signal: np.ndarray, range_down: int, range_up: int) -> np.ndarray:
+    """ distance to, and osc value at, the last signal in [range_down, range_up) candles back, for every t """
+    signal = np.asarray(signal, dtype=bool)
+    if _backend == 'numba':
+        return _numba_last_signal(np.asarray(osc, dtype=float), signal, range_down, range_up)
+    return _numpy_last_signal(osc, signal, range_down, range_up)
+
+def deriv(osc: np.ndarray) -> tuple:
+    """ first, second, third derivatives and slopes over two and three candles, for every t """
+    if _backend == 'numba':
+        return _numba_deriv(np.asarray(osc, dtype=float))
+    return _numpy_deriv(osc)
+
+def parity_cases(n: int = 10000, seed: int = 0) -> dict:
+    """ name -> (kernel, args) of every kernel on random candles with nans, covering the edge windows """
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    close[rng.integers(0, n, n // 1000 + 1)] = np.nan
+    signal = rng.random(n) < 0.05
+
+    cases = {f'rolling_extremum({start}, {future}, {is_max})': (rolling_extremum, (close, start, future, is_max))
+             for start, future in ((0, 0), (-20, 0), (-12, -2), (-5, 3), (-7, -7), (-200, 0)) for is_max in (True, False)}
+    cases.update({f'last_signal({down}, {up})': (last_signal, (close, signal, down, up))
+                  for down, up in ((0, 10), (1, 12), (3, 50), (5, 5), (n + 1, n + 2))})
+    cases['deriv'] = (deriv, (close,))
+    return cases
+
+def compare_backends(kernel, args: tuple, backend: str, rtol: float = 1e-9) -> float:
+    """
+    Runs kernel with the numpy reference and with backend, and checks they agree to tolerance
+
+    Returns
+    -------
+    float - maximum absolute difference, raises AssertionError if the backends disagree
+    """
+    previous = get_backend()
+    try:
+        set_backend('numpy')
+        expected = np.asarray(kernel(*args), dtype=float)
+        set_backend(backend)
+        result = np.asarray(kernel(*args), dtype=float)
+    finally:
+        set_backend(previous)
+
+    assert np.allclose(result, expected, rtol=rtol, atol=0, equal_nan=True), f'{kernel.__name__}: {backend} disagrees with numpy'
+    both = ~np.isnan(expected) & ~np.isnan(result)
+    return float(np.max(np.abs(result - expected)[both], initial=0))
+
+def parity(n: int = 10000, seed: int = 0, rtol: float = 1e-9) -> dict:
+    """
+    Runs every kernel on random candles with both backends and checks they agree to tolerance
+
+    Returns
+    -------
+    dict - maximum absolute difference per kernel, raises AssertionError if one is off
+    """
+    if numba is None:
+        raise ImportError('the numba backend requires numba to be installed')
+    return {name: compare_backends(kernel, args, 'numba', rtol) for name, (kernel, args) in parity_cases(n, seed).items()}
+
+_requested = os.environ.get('CUSTOM_INDICATORS_BACKEND', 'numba' if numba is not None else 'numpy')
+try:
+    set_backend(_requested)
+except (ValueError, ImportError) as e:
+    warnings.warn(f'{e}, falling back on the numpy backend')
+    set_backend('numpy')
+
+if __name__ == '__main__':
+    for kernel, diff in parity().items():
+        print(f'{kernel}: max abs diff {diff}')
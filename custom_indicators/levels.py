@@ -0,0 +1,100 @@
+"""
+Support / resistance zones detected incrementally from the pivots of the candles.
+"""
+
+from collections import deque, namedtuple
+
+import numpy as np
+
+from .streaming import StreamingIndicator
+from .tools import pivothigh, pivotlow
+
+Zone = namedtuple('Zone', ['low', 'high', 'touches', 'last_seen'])
+
+class _Atr:
+    """ talib.ATR one candle at a time: SMA of the first period true ranges, then Wilder's smoothing """
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.ranges = []
+        self.close = None
+        self.value = np.nan
+    
+    def update(self, candle) -> float:
+        high, low, close = candle[3], candle[4], candle[2]
+        if self.close is not None:
+            tr = max(high - low, abs(high - self.close), abs(low - self.close))
+            if len(self.ranges) < self.period:
+                self.ranges.append(tr)
+                if len(self.ranges) == self.period:
+                    self.value = sum(self.ranges) / self.period
+            else:
+                self.value = (self.value * (self.period - 1) + tr) / self.period
+        self.close = close
+        return self.value
+
+class LevelDetector(StreamingIndicator):
+    """
+    Streaming support / resistance zones:
+    - a pivot high (low) is confirmed once the future candles following it have closed
+    - a pivot is merged into the closest zone it keeps narrower than tolerance x ATR, otherwise it starts a new zone
+    - zones without a pivot for more than max_age candles are dropped, and only the max_zones most recent are kept
+    
+    value is the list of (low, high) zones sorted by price, each widened by half the tolerance,
+    in the format of RangeReversal's self.vars['zones']. The Zone records are in self.zones.
+    
+    Parameters
+    ----------
+    past : int - candles on the left of a pivot
+    future : int - candles on the right of a pivot, which is the confirmation delay
+    tolerance : float - merge distance in ATR
+    atr_period : int
+    max_age : int - candles since the last pivot after which a zone is stale
+    max_zones : int
+    """
+    
+    def __init__(self, past: int = 12, future: int = 2, tolerance: float = 1, atr_period: int = 14, max_age: int = 500, max_zones: int = 10):
+        super().__init__()
+        self.past = past
+        self.future = future
+        self.tolerance = tolerance
+        self.max_age = max_age
+        self.max_zones = max_zones
+        self.atr = _Atr(atr_period)
+        self.highs = deque(maxlen=past + future + 1)
+        self.lows = deque(maxlen=past + future + 1)
+        self.zones = []
+    
+    def _next(self, candle):
+        atr = self.atr.update(candle)
+        self.highs.append(candle[3])
+        self.lows.append(candle[4])
+        t = self.count - 1
+        
+        if len(self.highs) == self.highs.maxlen and not np.isnan(atr):
+            # the candle at self.past in the window has now `future` candles on its right
+            highs, lows = np.array(self.highs), np.array(self.lows)
+            if pivothigh(highs, self.past, self.future)[self.past]:
+                self._add(highs[self.past], t - self.future, atr)
+            if pivotlow(lows, self.past, self.future)[self.past]:
+                self._add(lows[self.past], t - self.future, atr)
+        
+        self.zones = [z for z in self.zones if t - z.last_seen <= self.max_age]
+        
+        pad = self.tolerance * atr / 2
+        return [(z.low - pad, z.high + pad) for z in self.zones]
+    
+    def _add(self, price: float, index: int, atr: float) -> None:
+        tol = self.tolerance * atr
+        zones = list(self.zones)
+        fits = [z for z in zones if max(z.high, price) - min(z.low, price) <= tol]
+        if fits:
+            z = min(fits, key=lambda z: abs((z.low + z.high) / 2 - price))
+            zones.remove(z)
+            zones.append(Zone(min(z.low, price), max(z.high, price), z.touches + 1, index))
+        else:
+            zones.append(Zone(price, price, 1, index))
+        
+        if len(zones) > self.max_zones:
+            zones.remove(min(zones, key=lambda z: z.last_seen))
+        self.zones = sorted(zones)
@@ -1,6 +1,6 @@
 import numpy as np
 
-from jesse.helpers import slice_candles
+from .candlestick_patterns import candlestick_patterns, MARUBOZU_BULL, MARUBOZU_BEAR
 
 def marubozu(candles: np.ndarray, body: float = 0.1, sensivity: float = 0, sequential: bool = False) -> bool:
     """
@@ -17,19 +17,11 @@ def marubozu(candles: np.ndarray, body: float = 0.1, sensivity: float = 0, seque
     -------
     int | np.ndarray - +1 if bullish mrbz candle, -1 if bearish, 0 else
     """
-    
-    candles = slice_candles(candles, sequential)
+    mask = candlestick_patterns(candles, marubozu_body=body, marubozu_sensivity=sensivity, sequential=sequential)
 
-    open = candles[:, 1]
-    close = candles[:, 2]
-    high = candles[:, 3]
-    low = candles[:, 4]
-    
-    bull = np.where(open < close and (close - open) / open >= body / 100 and (high - close) / close <= sensivity / 100, 1, 0)
-    bear = np.where(open > close and (open - close) / open >= body / 100 and (close - low) / close <= sensivity / 100, -1, 0)
-    mrbz = np.where(bull > 0, bull, bear)
+    mrbz = np.select([mask & MARUBOZU_BULL != 0, mask & MARUBOZU_BEAR != 0], [1, -1], 0)
 
     if sequential:
         return mrbz
     else:
-        return mrbz[-1]
+        return int(mrbz)
@@ -1,5 +1,9 @@
 import numpy as np
 
+from jesse.helpers import slice_candles
+
+from .candlestick_patterns import candlestick_patterns, PINBAR_BULL, PINBAR_BEAR
+
 def pinbar(candles: np.ndarray, sensivity: float = 0.5, wick: float = 60, sequential: bool = False) -> bool:
     """
     Pinbar candlestick pattern - https://www.youtube.com/watch?v=p10LWky-SRQ
@@ -16,36 +20,14 @@ def pinbar(candles: np.ndarray, sensivity: float = 0.5, wick: float = 60, sequen
     +high if the pinbar is bearish, -low if bullish, 0 otherwise
 
     """
-    if sequential:
-        open = candles[:, 1]
-        close = candles[:, 2]
-        high = candles[:, 3]
-        low = candles[:, 4]
-        
-        amplitude = high - low
-        
-        top_wick = high - np.maximum(open, close)
-        bottom_wick = np.minimun(open,close) - low
-        
-        bull = np.where(top_wick / amplitude > wick / 100 and amplitude / low > sensivity / 100, high, 0)
-        bear = np.where(bottom_wick / amplitude > wick / 100 and amplitude / low > sensivity / 100, -low, 0)
-        
-        return bull + bear
+    mask = candlestick_patterns(candles, pinbar_sensivity=sensivity, pinbar_wick=wick, sequential=sequential)
 
+    if sequential:
+        candles = slice_candles(candles, sequential)
+        return np.where(mask & PINBAR_BULL, candles[:, 3], np.where(mask & PINBAR_BEAR, -candles[:, 4], 0))
+    elif mask & PINBAR_BULL:
+        return candles[-1, 3]
+    elif mask & PINBAR_BEAR:
+        return -candles[-1, 4]
     else:
-        open = candles[-1, 1]
-        close = candles[-1, 2]
-        high = candles[-1, 3]
-        low = candles[-1, 4]
-    
-        amplitude = high - low
-        
-        top_wick = high - max(open, close)
-        bottom_wick = min(open,close) - low
-    
-        if top_wick / amplitude > wick / 100 and amplitude / low > sensivity / 100:
-            return high
-        elif bottom_wick / amplitude > wick / 100 and amplitude / low > sensivity / 100:
-            return -low
-        else:
-            return 0
+        return 0
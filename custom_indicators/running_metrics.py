@@ -0,0 +1,118 @@
+import numpy as np
+
+from jesse.enums import trade_types
+
+class RunningMetrics:
+    """
+    Metrics of the completed trades, updated in O(1) as each trade closes, behind
+    Strategy.running_metrics and vectorized_backtest.metrics().
+
+    The keys shared with jesse.services.metrics.trades() have the same meaning. The drawdown and the
+    Sharpe ratio, which jesse measures on the daily balance, are measured here trade by trade (on the
+    balance after each trade and on the trades' returns) under their own names.
+    """
+
+    def __init__(self, starting_balance: float) -> None:
+        self.starting_balance = starting_balance
+        self.balance = starting_balance
+        self.max_balance = starting_balance
+        self.max_drawdown = 0
+
+        self.total = 0
+        self.winning = 0
+        self.losing = 0
+        self.longs = 0
+        self.shorts = 0
+        self.gross_profit = 0
+        self.gross_loss = 0
+        self.largest_win = 0
+        self.largest_loss = 0
+        self.fee = 0
+
+        # current streak, positive for wins and negative for losses, and the longest ones
+        self.streak = 0
+        self.winning_streak = 0
+        self.losing_streak = 0
+
+        # Welford's running mean and sum of squared deviations of the trades' returns
+        self._mean = 0
+        self._m2 = 0
+
+    def add(self, trade) -> None:
+        """ adds a jesse CompletedTrade """
+        self.record(trade.pnl, trade.type == trade_types.LONG, trade.fee, trade.pnl_percentage)
+
+    def record(self, pnl: float, long: bool, fee: float, return_percentage: float) -> None:
+        """ adds a trade from its values, return_percentage being its pnl relative to its cost """
+        self.total += 1
+        # like jesse, a trade closed at break even is neither a win nor a loss
+        if pnl > 0:
+            self.winning += 1
+            self.gross_profit += pnl
+            self.largest_win = max(self.largest_win, pnl)
+            self.streak = max(self.streak, 0) + 1
+        elif pnl < 0:
+            self.losing += 1
+            self.gross_loss += pnl
+            self.largest_loss = min(self.largest_loss, pnl)
+            self.streak = min(self.streak, 0) - 1
+        else:
+            self.streak = 0
+        self.winning_streak = max(self.winning_streak, self.streak)
+        self.losing_streak = max(self.losing_streak, -self.streak)
+        if long:
+            self.longs += 1
+        else:
+            self.shorts += 1
+        self.fee += fee
+
+        self.balance += pnl
+        self.max_balance = max(self.max_balance, self.balance)
+        if self.max_balance > 0:
+            self.max_drawdown = min(self.max_drawdown, (self.balance / self.max_balance - 1) * 100)
+
+        delta = return_percentage - self._mean
+        self._mean += delta / self.total
+        self._m2 += delta * (return_percentage - self._mean)
+
+    @property
+    def metrics(self) -> dict:
+        if self.total == 0:
+            return {'total': 0, 'win_rate': 0, 'net_profit_percentage': 0}
+
+        net_profit = self.balance - self.starting_balance
+        win_rate = self.winning / (self.winning + self.losing) if self.winning + self.losing else 0
+        average_win = self.gross_profit / self.winning if self.winning else np.nan
+        average_loss = abs(self.gross_loss) / self.losing if self.losing else np.nan
+        expectancy = (0 if np.isnan(average_win) else average_win) * win_rate \
+            - (0 if np.isnan(average_loss) else average_loss) * (1 - win_rate)
+        std = (self._m2 / (self.total - 1)) ** 0.5 if self.total > 1 else 0
+        return {
+            'total': self.total,
+            'total_winning_trades': self.winning,
+            'total_losing_trades': self.losing,
+            'win_rate': win_rate,
+            'winning_streak': self.winning_streak,
+            'losing_streak': self.losing_streak,
+            'largest_winning_trade': self.largest_win,
+            'largest_losing_trade': self.largest_loss,
+            'longs_count': self.longs,
+            'shorts_count': self.shorts,
+            'longs_percentage': self.longs / self.total * 100,
+            'shorts_percentage': self.shorts / self.total * 100,
+            'gross_profit': self.gross_profit,
+            'gross_loss': self.gross_loss,
+            'fee': self.fee,
+            'net_profit': net_profit,
+            'net_profit_percentage': net_profit / self.starting_balance * 100 if self.starting_balance else 0,
+            'average_win': average_win,
+            'average_loss': average_loss,
+            'ratio_avg_win_loss': average_win / average_loss,
+            'expectancy': expectancy,
+            'expectancy_percentage': expectancy / self.starting_balance * 100 if self.starting_balance else 0,
+            'starting_balance': self.starting_balance,
+            'finishing_balance': self.balance,
+            'trade_average_return_percentage': self._mean,
+            'trade_max_drawdown': self.max_drawdown,
+            'trade_sharpe_ratio': self._mean / std if std else np.nan,
+        }
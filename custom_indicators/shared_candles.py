@@ -0,0 +1,92 @@
+"""
+Candles published once in shared memory by the parent process and attached zero-copy by the workers.
+
+    with SharedCandles.publish(candles) as shared:   # {(exchange, symbol, timeframe): np.ndarray}
+        evaluation = VectorizedEvaluation(SuperDuperSuperTrend, shared, key=('Binance', 'BTC-USDT', '4h'))
+        sweep(evaluation, dnas, 'storage/sweeps/sddst.csv')
+
+Pickling a SharedCandles only sends the name and the layout of its memory block, the worker maps the
+same block read-only. It serves the vectorized evaluations of the sweeps: the event-driven engine keeps
+its own copy of the candles in its store, which the shared block cannot back.
+"""
+
+from collections.abc import Mapping
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    """ attaches to an existing block without letting this process' resource tracker destroy it on exit """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13
+        memory = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+class SharedCandles(Mapping):
+    """ read-only mapping of (exchange, symbol, timeframe) to candles, backed by one shared memory block """
+
+    def __init__(self, memory: shared_memory.SharedMemory, layout: dict, owner: bool = False) -> None:
+        self._memory = memory
+        self._owner = owner
+        # key -> (offset in bytes, shape)
+        self.layout = layout
+        self._arrays = {}
+        for key, (offset, shape) in layout.items():
+            array = np.ndarray(shape, dtype=np.float64, buffer=memory.buf, offset=offset)
+            array.flags.writeable = False
+            self._arrays[key] = array
+
+    @classmethod
+    def publish(cls, candles: dict) -> 'SharedCandles':
+        """ copies the candles into a new shared memory block, owned by the calling process """
+        layout, size = {}, 0
+        for key, array in candles.items():
+            layout[key] = (size, np.shape(array))
+            size += np.size(array) * 8
+
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, array in candles.items():
+            offset, shape = layout[key]
+            np.ndarray(shape, dtype=np.float64, buffer=memory.buf, offset=offset)[:] = array
+        return cls(memory, layout, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, layout: dict) -> 'SharedCandles':
+        return cls(_open(name), layout)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def __reduce__(self):
+        return SharedCandles.attach, (self.name, self.layout)
+
+    def __getitem__(self, key: tuple) -> np.ndarray:
+        return self._arrays[key]
+
+    def __iter__(self):
+        return iter(self._arrays)
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    def close(self) -> None:
+        """ detaches from the block, and destroys it in the publishing process """
+        self._arrays = {}
+        try:
+            self._memory.close()
+        except BufferError:
+            # arrays of the block are still referenced, it is freed along with them
+            pass
+        if self._owner:
+            self._memory.unlink()
+            self._owner = False
+
+    def __enter__(self) -> 'SharedCandles':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
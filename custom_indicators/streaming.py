@@ -0,0 +1,299 @@
+"""
+Stateful counterparts of the custom indicators, updated with one candle at a time in O(1)
+instead of recomputing the whole slice_candles window on every bar.
+
+    st = HasStream(12, 3)
+    for candle in candles:
+        st.update(candle)
+    st.value  # same as has(candles)
+
+Bind them once per route with Strategy.bind_indicator() to have them updated on every new candle.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+from .candlestick_patterns import ENGULFING_1_BULL, ENGULFING_1_BEAR, ENGULFING_2_BULL, \
+    ENGULFING_2_BEAR, PINBAR_BULL, PINBAR_BEAR, MARUBOZU_BULL, MARUBOZU_BEAR
+from .deriv import Deriv
+from .ha import HeikenAshi
+from .has import HeikenAshiSmoothed
+
+class StreamingIndicator(ABC):
+    """ value is None until the first update """
+    
+    def __init__(self):
+        self.count = 0
+        self.value = None
+    
+    def update(self, candle: np.ndarray):
+        self.count += 1
+        self.value = self._next(candle)
+        return self.value
+    
+    def warmup(self, candles: np.ndarray):
+        """ feeds the candles one by one, oldest first """
+        for candle in candles:
+            self.update(candle)
+        return self.value
+    
+    @abstractmethod
+    def _next(self, candle):
+        """ the value after the candle, self.count includes it """
+
+class _Ema:
+    """ talib.EMA one value at a time: seeded with the SMA of the first period values, leading nans skipped """
+    
+    def __init__(self, period: int):
+        self.alpha = 2 / (period + 1)
+        self.seed = []
+        self.period = period
+        self.value = np.nan
+    
+    def update(self, x: float) -> float:
+        if len(self.seed) < self.period:
+            if np.isnan(x) and len(self.seed) == 0:
+                return np.nan
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+class HaStream(StreamingIndicator):
+    """ streaming ha """
+    
+    def __init__(self, body: float = 0.1, size: float = 0.3):
+        super().__init__()
+        self.body = body
+        self.size = size
+        self.last = None
+    
+    def _next(self, candle):
+        open, close, high, low = candle[1], candle[2], candle[3], candle[4]
+        last_open, last_close = self.last if self.last is not None else (open, close)
+        self.last = open, close
+        
+        ha_open  = (last_open + last_close) / 2
+        ha_close = (open + close + high + low) / 4
+        
+        big     = max(ha_open - ha_close, ha_close - ha_open) / max(ha_open, ha_close) >= self.body / 100
+        big_ass = high - low / low >= self.size / 100
+        
+        return HeikenAshi(ha_open, ha_close, high, low, (ha_open <= low) and big and big_ass, (ha_open >= high) and big and big_ass)
+
+class HasStream(StreamingIndicator):
+    """ streaming has, the eight EMAs carry their state between candles """
+    
+    def __init__(self, len1: int = 12, len2: int = 3):
+        super().__init__()
+        self.ema1 = [_Ema(len1) for _ in range(4)]
+        self.ema2 = [_Ema(len2) for _ in range(4)]
+        self.last = np.nan, np.nan
+    
+    def _next(self, candle):
+        o, c, h, l = (ema.update(x) for ema, x in zip(self.ema1, candle[1:5]))
+        
+        haclose = (o + h + l + c) / 4
+        haopen = (self.last[0] + self.last[1]) / 2
+        hahigh = np.maximum(h, np.maximum(haopen, haclose))
+        halow = np.minimum(l, np.minimum(haopen, haclose))
+        self.last = o, c
+        
+        o2, c2, h2, l2 = (ema.update(x) for ema, x in zip(self.ema2, (haopen, haclose, hahigh, halow)))
+        
+        return HeikenAshiSmoothed(o2, c2, l2, h2, o2 < c2)
+
+class DerivStream(StreamingIndicator):
+    """ streaming deriv, updated with the oscillator's value instead of a candle """
+    
+    def __init__(self):
+        super().__init__()
+        self.shifts = deque([0., 0., 0.], maxlen=3)
+    
+    def _next(self, osc):
+        s1, s2, s3 = self.shifts
+        self.shifts.appendleft(osc)
+        
+        return Deriv((osc - s1) / osc,
+                     (osc - 2*s1 + s2) / osc,
+                     (osc - 3*s1 + 3*s2 - s3) / osc,
+                     (osc - s2) / (2 * osc),
+                     (osc - s3) / (3 * osc))
+
+def _div(a: float, b: float) -> float:
+    """ a / b with numpy's semantics for a zero b """
+    if b:
+        return a / b
+    return math.nan if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+
+class PatternsStream(StreamingIndicator):
+    """ streaming candlestick_patterns bitmask, the newest candle scanned against the two previous ones """
+    
+    def __init__(self, engulfing_size: float = 0.5, pinbar_sensivity: float = 0.5, pinbar_wick: float = 60,
+                 marubozu_body: float = 0.1, marubozu_sensivity: float = 0):
+        super().__init__()
+        self.engulfing_size = engulfing_size / 100
+        self.pinbar_sensivity = pinbar_sensivity / 100
+        self.pinbar_wick = pinbar_wick / 100
+        self.marubozu_body = marubozu_body / 100
+        self.marubozu_sensivity = marubozu_sensivity / 100
+        # (open, close, high, low) of the previous and the one before
+        self.last = None
+        self.prev = None
+    
+    def _next(self, candle):
+        open, close, high, low = (float(x) for x in candle[1:5])
+        mask = 0
+        
+        # single candle patterns
+        amplitude = high - low
+        big_pin = _div(amplitude, low) > self.pinbar_sensivity
+        if big_pin and _div(high - max(open, close), amplitude) > self.pinbar_wick:
+            mask |= PINBAR_BULL
+        if big_pin and _div(min(open, close) - low, amplitude) > self.pinbar_wick:
+            mask |= PINBAR_BEAR
+        if open < close and _div(close - open, open) >= self.marubozu_body and _div(high - close, close) <= self.marubozu_sensivity:
+            mask |= MARUBOZU_BULL
+        if open > close and _div(open - close, open) >= self.marubozu_body and _div(close - low, close) <= self.marubozu_sensivity:
+            mask |= MARUBOZU_BEAR
+        
+        # candle engulfing the previous one
+        if self.last is not None:
+            last_open, last_close, last_high, last_low = self.last
+            if last_open >= last_close and close >= last_high and last_close >= open and _div(close - open, open) > self.engulfing_size:
+                mask |= ENGULFING_1_BULL
+            if last_open <= last_close and close <= last_low and last_close <= open and _div(open - close, open) > self.engulfing_size:
+                mask |= ENGULFING_1_BEAR
+            
+            # candle engulfing the two previous ones
+            if self.prev is not None:
+                prev_open, prev_close, prev_high, prev_low = self.prev
+                if prev_open >= prev_close and close >= prev_high and last_open <= last_close and _div(close - prev_open, prev_open) > self.engulfing_size:
+                    mask |= ENGULFING_2_BULL
+                if prev_open <= prev_close and close <= prev_low and last_open >= last_close and _div(prev_open - close, prev_open) > self.engulfing_size:
+                    mask |= ENGULFING_2_BEAR
+        
+        self.prev, self.last = self.last, (open, close, high, low)
+        return mask
+
+class EngulfingStream(PatternsStream):
+    """ streaming engulfing """
+    
+    def __init__(self, size: float = 0.5):
+        super().__init__(engulfing_size=size)
+    
+    def _next(self, candle):
+        mask = super()._next(candle)
+        for bit, eng in ((ENGULFING_1_BULL, 1), (ENGULFING_1_BEAR, -1), (ENGULFING_2_BULL, 2), (ENGULFING_2_BEAR, -2)):
+            if mask & bit:
+                return eng
+        return 0
+
+class PinbarStream(PatternsStream):
+    """ streaming pinbar """
+    
+    def __init__(self, sensivity: float = 0.5, wick: float = 60):
+        super().__init__(pinbar_sensivity=sensivity, pinbar_wick=wick)
+    
+    def _next(self, candle):
+        mask = super()._next(candle)
+        if mask & PINBAR_BULL:
+            return candle[3]
+        elif mask & PINBAR_BEAR:
+            return -candle[4]
+        else:
+            return 0
+
+class MarubozuStream(PatternsStream):
+    """ streaming marubozu """
+    
+    def __init__(self, body: float = 0.1, sensivity: float = 0):
+        super().__init__(marubozu_body=body, marubozu_sensivity=sensivity)
+    
+    def _next(self, candle):
+        mask = super()._next(candle)
+        if mask & MARUBOZU_BULL:
+            return 1
+        elif mask & MARUBOZU_BEAR:
+            return -1
+        else:
+            return 0
+
+class _ExtremumStream(StreamingIndicator):
+    """
+    streaming tools.low/high with a monotonic deque: amortized O(1) per candle whatever the window.
+    With a negative future, values enter the window -future candles after they were received.
+    """
+    
+    def __init__(self, past: int = 20, future: int = 0, source: str = 'close'):
+        super().__init__()
+        self.start = min(-past, future)
+        self.future = future
+        self.source = source
+        self.pending = deque()
+        self.window = deque()
+        self.last_nan = None
+    
+    @abstractmethod
+    def _better(self, a, b) -> bool:
+        """ whether a replaces b as the extremum of the window """
+    
+    @abstractmethod
+    def _extremum(self, values: list) -> float:
+        """ the extremum of values """
+    
+    def _next(self, candle):
+        value = candle if np.ndim(candle) == 0 else candle[_SOURCES[self.source]]
+        t = self.count - 1
+        self.pending.append(value)
+        
+        # the value at index t + future enters the window
+        if len(self.pending) > max(0, -self.future):
+            index, value = t + min(0, self.future), self.pending.popleft()
+            if np.isnan(value):
+                self.last_nan = index
+            else:
+                while self.window and not self._better(self.window[-1][1], value):
+                    self.window.pop()
+                self.window.append((index, value))
+        while self.window and self.window[0][0] < t + self.start:
+            self.window.popleft()
+        
+        if self.last_nan is not None and self.last_nan >= t + self.start:
+            return np.nan
+        # out of range values count as 0, like in tools.low/high
+        values = [self.window[0][1]] if self.window else []
+        if t + self.start < 0 or self.future > 0 or not self.window:
+            values.append(0)
+        return self._extremum(values)
+
+class LowStream(_ExtremumStream):
+    """ streaming tools.low, updated with candles or indicator values """
+    
+    def __init__(self, past: int = 20, future: int = 0, source: str = 'low'):
+        super().__init__(past, future, source)
+    
+    def _better(self, a, b):
+        return a < b
+    
+    def _extremum(self, values):
+        return min(values)
+
+class HighStream(_ExtremumStream):
+    """ streaming tools.high, updated with candles or indicator values """
+    
+    def __init__(self, past: int = 20, future: int = 0, source: str = 'high'):
+        super().__init__(past, future, source)
+    
+    def _better(self, a, b):
+        return a > b
+    
+    def _extremum(self, values):
+        return max(values)
+
+_SOURCES = {'open': 1, 'close': 2, 'high': 3, 'low': 4, 'volume': 5}
@@ -0,0 +1,201 @@
+"""
+Hyperparameter sweeps over the hyperparameters() declared by a strategy, evaluated in a process pool.
+
+    dnas = latin_hypercube(SuperDuperSuperTrend().hyperparameters(), 500)
+    sweep(VectorizedEvaluation(SuperDuperSuperTrend, candles, fee_rate=0.0004), dnas, 'storage/sweeps/sddst.csv')
+
+Each result is appended to a CSV table as soon as its backtest finishes, one row per hyperparameters
+set with its metrics. Running the same sweep again on the same table resumes it: the sets already in
+the table are skipped.
+"""
+
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .vectorized_backtest import vectorized_backtest
+
+'''
+Sampling
+'''
+
+def _is_int(hp: dict) -> bool:
+    return hp['type'] in (int, 'int')
+
+def _scale(hyperparameters: list, unit: np.ndarray) -> list:
+    """ points of the unit hypercube, of shape (n, len(hyperparameters)), to hyperparameters dicts """
+    columns = []
+    for hp, u in zip(hyperparameters, unit.T):
+        if _is_int(hp):
+            # every integer of [min, max] gets the same share of the unit interval
+            columns.append(np.minimum(hp['min'] + np.floor(u * (hp['max'] - hp['min'] + 1)), hp['max']).astype(int).tolist())
+        else:
+            columns.append((hp['min'] + u * (hp['max'] - hp['min'])).tolist())
+    return [dict(zip((hp['name'] for hp in hyperparameters), values)) for values in zip(*columns)]
+
+def grid(hyperparameters: list, steps: int = 5) -> list:
+    """ every combination of steps values evenly spaced over each hyperparameter range (fewer for narrow int ranges) """
+    axes = []
+    for hp in hyperparameters:
+        values = np.linspace(hp['min'], hp['max'], steps)
+        axes.append(sorted(set(np.round(values).astype(int).tolist())) if _is_int(hp) else values.tolist())
+    names = [hp['name'] for hp in hyperparameters]
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+def random_samples(hyperparameters: list, n: int, seed: int = 0) -> list:
+    """ n uniformly drawn hyperparameters sets """
+    rng = np.random.default_rng(seed)
+    return _scale(hyperparameters, rng.random((n, len(hyperparameters))))
+
+def latin_hypercube(hyperparameters: list, n: int, seed: int = 0) -> list:
+    """ n hyperparameters sets, each range being cut in n strata that are all sampled once """
+    rng = np.random.default_rng(seed)
+    strata = np.argsort(rng.random((len(hyperparameters), n)), axis=1).T
+    return _scale(hyperparameters, (strata + rng.random(strata.shape)) / n)
+
+'''
+Evaluation
+'''
+
+class VectorizedEvaluation:
+    """
+    Backtest of a strategy with a vectorized_signals(candles) method (see cta.vectorized_backtest) for a
+    hyperparameters set. Picklable, so that it can be sent to the workers once. Pass a SharedCandles and
+    the key of the route as candles and key so that the workers attach the candles instead of copying them.
+    """
+
+    # columns of the sweep table, the metrics of a backtest without trades have fewer keys
+    metrics = ['total', 'total_winning_trades', 'total_losing_trades', 'win_rate', 'longs_count', 'shorts_count',
+               'gross_profit', 'gross_loss', 'fee', 'net_profit', 'net_profit_percentage', 'trade_max_drawdown',
+               'trade_sharpe_ratio', 'finishing_balance']
+
+    def __init__(self, strategy_class, candles, starting_balance: float = 10_000, fee_rate: float = 0, key: tuple = None) -> None:
+        self.strategy_class = strategy_class
+        self.source = candles
+        self.key = key
+        self.starting_balance = starting_balance
+        self.fee_rate = fee_rate
+
+    @property
+    def candles(self) -> np.ndarray:
+        return self.source if self.key is None else self.source[self.key]
+
+    def __call__(self, hp: dict) -> dict:
+        strategy = self.strategy_class()
+        strategy.hp = hp
+        candles = self.candles
+        signals = strategy.vectorized_signals(candles)
+        return vectorized_backtest(candles, **signals, starting_balance=self.starting_balance, fee_rate=self.fee_rate).metrics
+
+'''
+Sweep
+'''
+
+_evaluate = None
+
+def _init_worker(evaluate) -> None:
+    global _evaluate
+    _evaluate = evaluate
+
+def _run(hp: dict) -> tuple:
+    try:
+        return hp, _evaluate(hp), None
+    except Exception as e:
+        return hp, {}, f'{type(e).__name__}: {e}'
+
+def _key(hp: dict, names: list) -> tuple:
+    return tuple(str(hp[name]) for name in names)
+
+def _done(path: str, names: list) -> set:
+    """
+    keys of the sets already in the table, after dropping a row left incomplete by an interruption.
+    The sets whose evaluation failed are evaluated again.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'rb+') as f:
+        content = f.read()
+        if content and not content.endswith(b'\n'):
+            f.truncate(content.rfind(b'\n') + 1)
+    with open(path, newline='') as f:
+        return {_key(row, names) for row in csv.DictReader(f) if not row.get('error')}
+
+def sweep(evaluate, dnas: list, path: str, workers: int = None, metrics: list = None) -> int:
+    """
+    Parameters
+    ----------
+    evaluate : callable - picklable, hyperparameters dict -> metrics dict
+    dnas : list of dict - the hyperparameters sets to evaluate
+    path : str - the CSV table of the results, appended to and resumed from
+    workers : int - processes, one per core by default
+    metrics : list of str - the metrics to keep in the table, evaluate.metrics or those of the first result by default
+
+    Returns
+    -------
+    int - number of hyperparameters sets evaluated by this call
+    """
+    if not dnas:
+        return 0
+    names = list(dnas[0])
+    done = _done(path, names)
+    todo = [hp for hp in dnas if _key(hp, names) not in done]
+    if not todo:
+        return 0
+
+    columns = None
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, newline='') as f:
+            columns = next(csv.reader(f))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    with open(path, 'a', newline='') as f, \
+            ProcessPoolExecutor(workers or os.cpu_count(), initializer=_init_worker, initargs=(evaluate,)) as pool:
+        writer, pending = None, []
+        metrics = metrics or getattr(evaluate, 'metrics', None)
+        for count, future in enumerate(as_completed([pool.submit(_run, hp) for hp in todo]), 1):
+            hp, result, error = future.result()
+            pending.append({**hp, **result, 'error': error or ''})
+            # the columns come from the first successful result, failures wait for it
+            if columns is None:
+                if error and count < len(todo):
+                    continue
+                columns = names + (metrics or [m for m in result if np.isscalar(result[m])]) + ['error']
+            if writer is None:
+                writer = csv.DictWriter(f, columns, extrasaction='ignore')
+                if f.tell() == 0:
+                    writer.writeheader()
+            writer.writerows(pending)
+            pending = []
+            f.flush()
+    return len(todo)
+
+def load(path: str) -> np.ndarray:
+    """
+    the table of a sweep as a structured array, numeric columns as floats with nan for the empty cells.
+    A failed set evaluated again later appears once, with its last result.
+    """
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return np.array([])
+
+    # the hyperparameters are the only cells a failed row fills besides its error
+    failed = [row for row in rows if row.get('error')]
+    if failed:
+        names = [name for name, value in failed[0].items() if value != '' and name != 'error']
+        last = {_key(row, names): k for k, row in enumerate(rows)}
+        succeeded = {_key(row, names) for row in rows if not row.get('error')}
+        rows = [row for k, row in enumerate(rows)
+                if not row.get('error') or (_key(row, names) not in succeeded and last[_key(row, names)] == k)]
+
+    def convert(values):
+        try:
+            return np.array([np.nan if value == '' else float(value) for value in values])
+        except ValueError:
+            return np.array(values)
+
+    columns = {name: convert([row[name] for row in rows]) for name in rows[0]}
+    return np.rec.fromarrays(list(columns.values()), names=list(columns))
@@ -0,0 +1,136 @@
+"""
+Higher timeframe candles derived from a base (1m) stream, the anchor and macro series of the strategies.
+
+    aggregator = TimeframeAggregator(['4h', '1D', '1W'])
+    aggregator.warmup(candles_1m)        # one vectorized pass
+    aggregator.update(candle_1m)         # then O(1) per candle and timeframe
+    aggregator.get('1D')                 # completed candles and the one in progress
+
+Candles start on multiples of their timeframe since the epoch, except weekly ones which start on mondays.
+"""
+
+import numpy as np
+
+TIMEFRAMES = {
+    '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30, '45m': 45,
+    '1h': 60, '2h': 120, '3h': 180, '4h': 240, '6h': 360, '8h': 480, '12h': 720,
+    '1D': 1440, '3D': 4320, '1W': 10080,
+}
+
+MINUTE = 60_000
+# 1970-01-05, the first monday after the epoch
+_WEEK_OFFSET = 4 * 1440 * MINUTE
+
+def _offset(timeframe: str) -> int:
+    return _WEEK_OFFSET if timeframe == '1W' else 0
+
+def candle_start(timestamp, timeframe: str):
+    """ timestamp of the candle of the timeframe holding timestamp (scalar or array) """
+    duration, offset = TIMEFRAMES[timeframe] * MINUTE, _offset(timeframe)
+    return (timestamp - offset) // duration * duration + offset
+
+def aggregate(candles: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Parameters
+    ----------
+    candles : np.ndarray - candles of a smaller timeframe dividing timeframe, oldest first
+    timeframe : str
+
+    Returns
+    -------
+    np.ndarray - the candles of the timeframe, the last one may be in progress
+    """
+    if len(candles) == 0:
+        return np.empty((0, 6))
+    starts = candle_start(candles[:, 0], timeframe)
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+    last = np.append(first[1:], len(candles)) - 1
+    return np.column_stack((
+        starts[first],
+        candles[first, 1],
+        candles[last, 2],
+        np.maximum.reduceat(candles[:, 3], first),
+        np.minimum.reduceat(candles[:, 4], first),
+        np.add.reduceat(candles[:, 5], first),
+    ))
+
+def aggregate_all(candles: np.ndarray, timeframes: list, base: str = '1m') -> dict:
+    """ every timeframe in one pass each, derived from the biggest smaller timeframe dividing it """
+    result = {base: candles}
+    for timeframe in sorted(set(timeframes), key=TIMEFRAMES.get):
+        if timeframe == base:
+            continue
+        sources = [t for t in result if TIMEFRAMES[timeframe] % TIMEFRAMES[t] == 0 and (_offset(t) - _offset(timeframe)) % (TIMEFRAMES[t] * MINUTE) == 0]
+        result[timeframe] = aggregate(result[max(sources, key=TIMEFRAMES.get)], timeframe)
+    return {timeframe: result[timeframe] for timeframe in timeframes}
+
+class TimeframeAggregator:
+    """ higher timeframe candles updated with every base candle, in growing preallocated buffers """
+
+    def __init__(self, timeframes: list, base: str = '1m', capacity: int = 1024) -> None:
+        self.base = base
+        self.timeframes = list(timeframes)
+        self._durations = {t: TIMEFRAMES[t] * MINUTE for t in self.timeframes}
+        self._buffers = {t: np.empty((capacity, 6)) for t in self.timeframes}
+        self._counts = dict.fromkeys(self.timeframes, 0)
+        # timestamp of the last base candle
+        self.time = None
+
+    def _append(self, timeframe: str, row) -> None:
+        buffer, n = self._buffers[timeframe], self._counts[timeframe]
+        if n == len(buffer):
+            buffer = self._buffers[timeframe] = np.concatenate((buffer, np.empty_like(buffer)))
+        buffer[n] = row
+        self._counts[timeframe] = n + 1
+
+    def update(self, candle: np.ndarray) -> None:
+        """ adds a base candle, newer than the previous one """
+        timestamp, open, close, high, low, volume = candle[:6]
+        self.time = timestamp
+        for timeframe in self.timeframes:
+            start = candle_start(timestamp, timeframe)
+            buffer, n = self._buffers[timeframe], self._counts[timeframe]
+            if n and buffer[n - 1, 0] == start:
+                current = buffer[n - 1]
+                current[2] = close
+                current[3] = max(current[3], high)
+                current[4] = min(current[4], low)
+                current[5] += volume
+            else:
+                self._append(timeframe, (start, open, close, high, low, volume))
+
+    def warmup(self, candles: np.ndarray) -> None:
+        """ adds base candles, newer than the previous ones, in one vectorized pass per timeframe """
+        if len(candles) == 0:
+            return
+        if self.time is not None:
+            # the candles in progress are completed candle by candle
+            while len(candles) and any(candle_start(candles[0, 0], t) == self._buffers[t][self._counts[t] - 1, 0] for t in self.timeframes if self._counts[t]):
+                self.update(candles[0])
+                candles = candles[1:]
+            if len(candles) == 0:
+                return
+
+        for timeframe, aggregated in aggregate_all(candles, self.timeframes, self.base).items():
+            n, size = self._counts[timeframe], len(aggregated)
+            if n + size > len(self._buffers[timeframe]):
+                buffer = np.empty((2 * (n + size), 6))
+                buffer[:n] = self._buffers[timeframe][:n]
+                self._buffers[timeframe] = buffer
+            self._buffers[timeframe][n:n + size] = aggregated
+            self._counts[timeframe] = n + size
+        self.time = candles[-1, 0]
+
+    def is_complete(self, timeframe: str) -> bool:
+        """ whether the last candle of the timeframe is complete """
+        n = self._counts[timeframe]
+        return n > 0 and bool(self.time + TIMEFRAMES[self.base] * MINUTE >= self._buffers[timeframe][n - 1, 0] + self._durations[timeframe])
+
+    def get(self, timeframe: str, in_progress: bool = True) -> np.ndarray:
+        """ read-only view of the candles of the timeframe, with or without the one in progress """
+        n = self._counts[timeframe]
+        if not in_progress and n and not self.is_complete(timeframe):
+            n -= 1
+        candles = self._buffers[timeframe][:n]
+        candles.flags.writeable = False
+        return candles
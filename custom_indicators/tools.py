@@ -4,7 +4,9 @@ Don't forget to import them all in __init___
 """
 
 import numpy as np
-from jesse.helpers import get_candle_source, slice_candles, np_shift
+from jesse.helpers import get_candle_source, slice_candles
+
+from . import kernels
 
 def last_signal(osc, signal, range_down, range_up):
     """
@@ -21,7 +23,7 @@ def last_signal(osc, signal, range_down, range_up):
 
     """
    
-    window = signal[-range_up: -range_down]
+    window = signal[-range_up: max(len(signal) - range_down, 0)]
     lasts = np.where(window)[0]
     if len(lasts) == 0:
         return (np.nan, np.nan)
@@ -30,10 +32,35 @@ def last_signal(osc, signal, range_down, range_up):
         return (distance, osc[-distance-1])
     
 def last_signal_in_range(osc, signal, range_down, range_up):
-    """ aggregates last_signal result in an array """
-    return np.array([last_signal(np_shift(osc, i), np_shift(signal, i, False), range_down, range_up) for i in range(len(signal)-1,-1,-1)]).T
+    """
+    last_signal computed at every candle in one pass: the index of the last signal is forward filled
+    with a cumulative max, then looked up range_down candles back and kept if it is less than range_up candles away
+    
+    Returns
+    -------
+    np.ndarray of shape (2, n) - distances then oscillator values, nan where there is no signal in the window
+
+    """
+    return kernels.last_signal(osc, signal, range_down, range_up)
 
     
+def _rolling_extremum(array, past, future, ufunc, sequential):
+    """
+    ufunc (np.minimum or np.maximum) reduction of array[t - past: t + future + 1] for every t in O(n),
+    whatever the size of the window (see kernels.rolling_extremum).
+    Values out of the array count as 0, like the np_shift fill value.
+    """
+    start = min(-past, future)
+    
+    if not sequential:
+        first, last = len(array) - 1 + start, len(array) - 1 + future
+        window = array[max(first, 0): max(last + 1, 0)]
+        if first < 0 or last >= len(array):
+            window = np.append(window, 0)
+        return ufunc.reduce(window)
+    
+    return kernels.rolling_extremum(array, start, future, ufunc is np.maximum)
+
 def low(array, past: int = 20, future: int = 0, source: str = 'low', sequential = False):
     """
     Parameters
@@ -49,22 +76,14 @@ def low(array, past: int = 20, future: int = 0, source: str = 'low', sequential
     the low of the price source or the indicator passed in parameters on the given window
 
     """
-    if len(array.shape) == 1:
-        lows = np_shift(array, -future)
-    elif len(array.shape) == 2:
+    if len(array.shape) == 2:
         array = slice_candles(array, sequential)
         array = get_candle_source(array, source)
-        lows = np_shift(array, -future)
-    for i in range(-past,future):
-        lows = np.minimum(lows, np_shift(array, -i))
-    if sequential:
-        return lows
-    else:
-        return lows[-1]
+    return _rolling_extremum(array, past, future, np.minimum, sequential)
 
 def pivotlow(array, past, future):
     """ np.ndarray of bool, true if array value is the low in the window """ 
-    return array == low(array, past, future)
+    return array == low(array, past, future, sequential=True)
 
 def high(array, past: int = 20, future: int = 0, source: str = 'high', sequential = False):
     """
@@ -81,22 +100,14 @@ def high(array, past: int = 20, future: int = 0, source: str = 'high', sequentia
     the high of the price source or the indicator passed in parameters on the given window
 
     """
-    if len(array.shape) == 1:
-        highs = np_shift(array, -future)
-    elif len(array.shape) == 2:
+    if len(array.shape) == 2:
         array = slice_candles(array, sequential)
         array = get_candle_source(array, source)
-        highs = np_shift(array, -future)
-    for i in range(-past,future):
-        highs = np.maximum(highs, np_shift(array, -i))
-    if sequential:
-        return highs
-    else:
-        return highs[-1]
+    return _rolling_extremum(array, past, future, np.maximum, sequential)
 
 def pivothigh(array, past, future):
     """ np.ndarray of bool, true if array value is the high in the window """ 
-    return array == high(array, past, future)
+    return array == high(array, past, future, sequential=True)
 
 def zoom_timeframe(timeframe):
     """ inverse of anchor_timeframe  """
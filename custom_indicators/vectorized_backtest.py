@@ -0,0 +1,196 @@
+"""
+Vectorized backtest of strategies expressed as arrays, for a fast first-pass screen of hyperparameters
+before running the event-driven engine.
+
+The strategy supplies, for every candle of the route:
+- signal: 1 to go long, -1 to go short, 0 otherwise, at the close of the candle (market order)
+- stop: the stop-loss price of a position opened at that candle
+- take_profit: one or several take-profit prices, each closing a fraction of the qty
+- exit: true to liquidate the position at the close of the candle (market order)
+
+It follows the event-driven engine on the route's candles only: the stop-loss and take-profits
+are checked from the next candle on, and when a candle reaches both the stop-loss and a take-profit,
+the stop-loss is assumed to be hit first. A position still open on the last candle is reported apart
+from the trades, marked to the last close. Check the results with compare() against the trades of a
+regular backtest on the same data.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .running_metrics import RunningMetrics
+from .tools import risk_to_qty
+
+VectorizedBacktest = namedtuple('VectorizedBacktest', ['trades', 'metrics', 'open_trade'])
+
+TRADE_DTYPE = np.dtype([
+    ('entry_index', np.int64), ('exit_index', np.int64), ('type', np.int8), ('qty', float),
+    ('entry_price', float), ('exit_price', float), ('fee', float), ('pnl', float),
+])
+
+def _first_hit(values: np.ndarray, starts: np.ndarray, levels: np.ndarray, below: bool) -> np.ndarray:
+    """
+    first index j >= starts[k] where values[j] <= levels[k] (below) or values[j] >= levels[k], len(values) if none.
+    Binary lifting over a sparse table of the rolling min (max) of values on power of two windows,
+    for all the starts at once in O((n + len(starts)) log n).
+    """
+    n = len(values)
+    ufunc, fill = (np.fmin, np.inf) if below else (np.fmax, -np.inf)
+    table = [np.where(np.isnan(values), fill, values)]
+    while 2 ** len(table) <= n:
+        previous, half = table[-1], 2 ** (len(table) - 1)
+        table.append(ufunc(previous, np.concatenate((previous[half:], np.full(half, fill)))))
+
+    position = np.asarray(starts, dtype=np.int64).copy()
+    for p in reversed(range(len(table))):
+        extremum = table[p][np.minimum(position, n - 1)]
+        hit = extremum <= levels if below else extremum >= levels
+        position = np.where((position < n) & ~hit, position + 2 ** p, position)
+    return np.minimum(position, n)
+
+def _candidates(candles, signal, stop, take_profit, exit):
+    """
+    exit index and price of the stop-loss or liquidation, and take-profit hits, of a position opened at each signal.
+    The exit index is len(candles) for a position that is not closed, its price the last close.
+    """
+    n = len(candles)
+    close, high, low = candles[:, 2], candles[:, 3], candles[:, 4]
+    index = np.flatnonzero(signal)
+    direction = np.sign(signal[index]).astype(np.int8)
+    entry = close[index]
+    long = direction > 0
+
+    # a stop-loss on the wrong side of the entry is rejected by the engine, so is the signal
+    valid = np.where(long, stop[index] < entry, stop[index] > entry)
+    index, direction, entry, long = index[valid], direction[valid], entry[valid], long[valid]
+    stops, tps = stop[index], take_profit[index]
+
+    stop_hit = np.full(len(index), n)
+    stop_hit[long] = _first_hit(low, index[long] + 1, stops[long], below=True)
+    stop_hit[~long] = _first_hit(high, index[~long] + 1, stops[~long], below=False)
+
+    exits = np.where(exit, np.arange(n), n)
+    next_exit = np.minimum.accumulate(exits[::-1])[::-1]
+    exit_hit = np.append(next_exit, n)[np.minimum(index + 1, n)]
+
+    stopped = stop_hit <= exit_hit
+    end = np.where(stopped, stop_hit, exit_hit)
+    stopped &= end < n
+    end_price = np.where(stopped, stops, close[np.minimum(end, n - 1)])
+
+    # take-profits on the wrong side of the entry are ignored, the engine would raise
+    tps = np.where(np.where(long[:, None], tps > entry[:, None], tps < entry[:, None]), tps, np.nan)
+    tp_hit = np.full(tps.shape, n)
+    for level in range(tps.shape[1]):
+        tp_hit[long, level] = _first_hit(high, index[long] + 1, np.where(np.isnan(tps[long, level]), np.inf, tps[long, level]), below=False)
+        tp_hit[~long, level] = _first_hit(low, index[~long] + 1, np.where(np.isnan(tps[~long, level]), -np.inf, tps[~long, level]), below=True)
+    filled = (tp_hit < end[:, None]) | ((tp_hit == end[:, None]) & ~stopped[:, None] & (tp_hit < n))
+    return index, direction, entry, stops, end, end_price, tps, tp_hit, filled
+
+def vectorized_backtest(candles: np.ndarray, signal: np.ndarray, stop: np.ndarray, take_profit: np.ndarray = None,
+                        tp_qty=1., exit: np.ndarray = None, risk=None, qty=1., starting_balance: float = 10_000,
+                        fee_rate: float = 0) -> VectorizedBacktest:
+    """
+    Parameters
+    ----------
+    candles : np.ndarray - the route's candles
+    signal : np.ndarray - 1 long, -1 short, 0 nothing, for every candle (bool for longs only)
+    stop : np.ndarray - stop-loss price for a position opened at every candle
+    take_profit : np.ndarray - take-profit prices, of shape (n,) or (n, levels), nan for none
+    tp_qty : float or np.ndarray - fraction of the qty closed by each take-profit level
+    exit : np.ndarray - bool, liquidate at the close of the candle
+    risk : float or np.ndarray - percentage of the balance risked per trade (like cta.risk_to_qty), or for a
+        position opened at every candle, otherwise qty is used
+    qty : float or np.ndarray - qty per trade, or for a position opened at every candle
+    starting_balance : float
+    fee_rate : float - paid on the notional of every fill
+
+    Returns
+    -------
+    VectorizedBacktest(trades, metrics, open_trade) - structured array of the closed trades (TRADE_DTYPE), their
+        metrics, and the position still open at the last candle (a TRADE_DTYPE record with an exit_index of -1,
+        its exit price and pnl marked to the last close) or None
+    """
+    n = len(candles)
+    signal = np.asarray(signal).astype(np.int8)
+    stop = np.broadcast_to(np.asarray(stop, dtype=float), n)
+    if take_profit is None:
+        take_profit = np.full(n, np.nan)
+    take_profit = np.asarray(take_profit, dtype=float).reshape(n, -1)
+    tp_qty = np.broadcast_to(np.asarray(tp_qty, dtype=float), take_profit.shape[1])
+    if exit is None:
+        exit = np.zeros(n, dtype=bool)
+    qty = np.broadcast_to(np.asarray(qty, dtype=float), n)
+    if risk is not None:
+        risk = np.broadcast_to(np.asarray(risk, dtype=float), n)
+
+    index, direction, entry, stops, end, end_price, tps, tp_hit, filled = _candidates(candles, signal, stop, take_profit, exit)
+
+    # a position closed by its take-profits ends at the last one
+    remaining = 1 - (filled * tp_qty).sum(axis=1)
+    closed = remaining <= 1e-12
+    end = np.where(closed, np.where(filled, tp_hit, -1).max(axis=1), end)
+    remaining = np.maximum(remaining, 0)
+    tp_cost = np.where(filled, tps * tp_qty, 0).sum(axis=1)
+    exit_price = (tp_cost + remaining * end_price) / ((filled * tp_qty).sum(axis=1) + remaining)
+
+    # chaining the positions: the next one opens at the first signal from the candle the last one closed
+    trades, open_trade, balance, candidate = [], None, starting_balance, 0
+    while candidate < len(index):
+        i = index[candidate]
+        size = risk_to_qty(balance, risk[i], entry[candidate], stops[candidate], fee_rate=fee_rate) if risk is not None else qty[i]
+        fee = fee_rate * size * (entry[candidate] + exit_price[candidate])
+        pnl = direction[candidate] * size * (exit_price[candidate] - entry[candidate]) - fee
+        trade = (i, end[candidate], direction[candidate], size, entry[candidate], exit_price[candidate], fee, pnl)
+        if end[candidate] >= n:
+            # never closed: the position blocks every later signal
+            open_trade = np.array((i, -1) + trade[2:], dtype=TRADE_DTYPE)[()]
+            break
+        balance += pnl
+        trades.append(trade)
+        candidate = np.searchsorted(index, end[candidate], side='left')
+        if candidate < len(index) and index[candidate] == i:
+            candidate += 1
+
+    trades = np.array(trades, dtype=TRADE_DTYPE)
+    return VectorizedBacktest(trades, metrics(trades, starting_balance), open_trade)
+
+def metrics(trades: np.ndarray, starting_balance: float) -> dict:
+    """ metrics of the trades, those of cta.RunningMetrics: jesse's keys, and the per-trade drawdown and Sharpe ratio as trade_* """
+    running = RunningMetrics(starting_balance)
+    for t in trades.tolist():
+        _, _, direction, qty, entry_price, _, fee, pnl = t
+        running.record(pnl, direction > 0, fee, pnl / (qty * entry_price) * 100)
+    return running.metrics
+
+def compare(result: VectorizedBacktest, trades: list, candles: np.ndarray, rtol: float = 1e-6) -> list:
+    """
+    Cross-checks the vectorized backtest with the completed trades of the event-driven engine on the same candles
+    (store.completed_trades.trades, or dicts with the same attributes). The position the engine closes at the end
+    of the backtest is result.open_trade, leave it out of trades.
+
+    Returns
+    -------
+    list of dict - the differences, empty if both engines agree
+    """
+    get = lambda t, name: t[name] if isinstance(t, dict) else getattr(t, name)
+    differences = []
+    if len(trades) != len(result.trades):
+        differences.append({'field': 'count', 'vectorized': len(result.trades), 'event': len(trades)})
+
+    for k, (vectorized, event) in enumerate(zip(result.trades, trades)):
+        expected = {
+            'entry_candle_timestamp': candles[vectorized['entry_index'], 0],
+            'exit_candle_timestamp': candles[vectorized['exit_index'], 0],
+            'type': 'long' if vectorized['type'] > 0 else 'short',
+            'entry_price': vectorized['entry_price'],
+            'exit_price': vectorized['exit_price'],
+            'pnl': vectorized['pnl'],
+        }
+        for field, value in expected.items():
+            other = get(event, field)
+            same = value == other if isinstance(value, str) else np.isclose(value, other, rtol=rtol, atol=0)
+            if not same:
+                differences.append({'trade': k, 'field': field, 'vectorized': value, 'event': other})
+    return differences
@@ -0,0 +1,64 @@
+import numpy as np
+
+class ZoneIndex:
+    """
+    Sorted index of price zones for O(log n) lookups. Every query takes a price or an array
+    of prices, for sequential mode.
+    
+        index = ZoneIndex([(3800., 4200.), (2500., 2900.), (1700., 1900.)])
+        index.contains(2600.)       # True
+        index.above(2600., 2)       # [2900., 3800.]
+        index.nearest(candles[:, 2])
+    
+    Parameters
+    ----------
+    zones : list of (low, high) - may overlap
+    """
+    
+    def __init__(self, zones):
+        self.zones = sorted(tuple(z) for z in zones)
+        bounds = np.array(self.zones, dtype=float).reshape(-1, 2)
+        self.lows = bounds[:, 0]
+        self.highs = bounds[:, 1]
+        # sorted and unique zone boundaries
+        self.levels = np.unique(bounds)
+        # for each zone, the zone reaching the highest price among it and the ones starting below it
+        records = self.highs == np.maximum.accumulate(self.highs) if len(self.highs) else np.zeros(0, dtype=bool)
+        self._cover = np.maximum.accumulate(np.where(records, np.arange(len(self.highs)), 0)) if len(self.highs) else np.zeros(0, dtype=int)
+    
+    def zone(self, price):
+        """ index in self.zones of a zone containing price, -1 if there is none """
+        if len(self.lows) == 0:
+            return np.full(np.shape(price), -1)[()]
+        i = np.searchsorted(self.lows, price, side='right') - 1
+        cover = self._cover[np.maximum(i, 0)]
+        return np.where((i >= 0) & (price <= self.highs[cover]), cover, -1)[()]
+    
+    def contains(self, price):
+        """ True if price is in one of the zones """
+        return self.zone(price) >= 0
+    
+    def above(self, price, k: int = 1, fill: float = np.nan):
+        """ the k next levels strictly above price, closest first, padded with fill """
+        j = np.searchsorted(self.levels, price, side='right')
+        return self._take(np.expand_dims(j, -1) + np.arange(k), fill)
+    
+    def below(self, price, k: int = 1, fill: float = np.nan):
+        """ the k next levels strictly below price, closest first, padded with fill """
+        j = np.searchsorted(self.levels, price, side='left')
+        return self._take(np.expand_dims(j, -1) - 1 - np.arange(k), fill)
+    
+    def nearest(self, price):
+        """ the level closest to price, nan if there are none """
+        if len(self.levels) == 0:
+            return np.full(np.shape(price), np.nan)[()]
+        j = np.searchsorted(self.levels, price)
+        lower = self.levels[np.maximum(j - 1, 0)]
+        upper = self.levels[np.minimum(j, len(self.levels) - 1)]
+        return np.where(np.abs(price - lower) <= np.abs(upper - price), lower, upper)[()]
+    
+    def _take(self, idx, fill):
+        if len(self.levels) == 0:
+            return np.full(idx.shape, fill)
+        valid = (idx >= 0) & (idx < len(self.levels))
+        return np.where(valid, self.levels[np.clip(idx, 0, len(self.levels) - 1)], fill)
@@ -36,6 +36,8 @@ class RangeReversal(Strategy):
         super().__init__()
         self.vars['zones'] = [(3800., 4200.), (2500., 2900.),(1700., 1900.)]
         self.vars['trail_period x4'] = 14
+        # (zones, their index), see zone_index
+        self._zone_index = None
     
     def hyperparameters(self):
         return [
@@ -65,19 +67,19 @@ class RangeReversal(Strategy):
     def anchor_candles(self):
         return self.get_candles(self.exchange, self.symbol, utils.anchor_timeframe(self.timeframe))
     
+    @property
+    def zone_index(self):
+        # rebuilt only when the zones change
+        zones = tuple(self.vars['zones'])
+        if self._zone_index is None or self._zone_index[0] != zones:
+            self._zone_index = zones, cta.ZoneIndex(zones)
+        return self._zone_index[1]
+    
     def find_tps(self, direction, tp1):
-        lines = np.sort(self.vars['zones'], axis = None)
         if direction:
-            tp2 = np.min(np.where(lines > tp1, lines, np.inf))
-            tp3 = np.min(np.where(lines > tp2, lines, np.inf))
-            tp4 = np.min(np.where(lines > tp3, lines, np.inf))
-            tp5 = np.min(np.where(lines > tp4, lines, np.inf))
-
+            tp2, tp3, tp4, tp5 = self.zone_index.above(tp1, 4, np.inf)
         else:
-            tp2 = np.max(np.where(lines < tp1, lines, 0))
-            tp3 = np.max(np.where(lines < tp2, lines, 0))
-            tp4 = np.max(np.where(lines < tp3, lines, 0))
-            tp5 = np.max(np.where(lines < tp4, lines, 0))
+            tp2, tp3, tp4, tp5 = self.zone_index.below(tp1, 4, 0)
         return tp2, tp3, tp4, tp5
         
     
@@ -87,15 +89,19 @@ class RangeReversal(Strategy):
     
     @property
     def atr(self):
-        return ta.atr(self.candles, self.hp['atr_period'])
+        return self.shared_indicator(ta.atr, self.hp['atr_period'])
     
     @property
     def supertrend(self):
-        return ta.supertrend(self.candles, self.hp['st_atr'], self.hp['st_period'])
+        return self.shared_indicator(ta.supertrend, self.hp['st_atr'], self.hp['st_period'])
     
     @property
     def trailing(self):
-        return ta.supertrend(self.candles, self.hp['st_atr'], self.vars['trail_period x4'] / 4.)
+        return self.shared_indicator(ta.supertrend, self.hp['st_atr'], self.vars['trail_period x4'] / 4.)
+    
+    @property
+    def patterns(self):
+        return self.shared_indicator(cta.candlestick_patterns, pinbar_sensivity = self.hp['sensivity x10'], pinbar_wick = self.hp['wick'])
     
     '''
     Filters
@@ -111,25 +117,19 @@ class RangeReversal(Strategy):
 
     def should_long(self) -> bool:
         if self.hp['risk_long'] != 0:
-            bull_pin_ok = cta.pinbar(self.candles, self.hp['sensivity x10'], self.hp['wick']) > 0
-            bull_eng_ok = cta.engulfing(self.candles) > 0
+            bull_ok = cta.pinbar_direction(self.patterns) > 0 or cta.engulfing_direction(self.patterns) > 0
             trend_ok = self.close < self.supertrend.trend
-            zone = False
-            for (low, high) in self.vars['zones']:
-                zone = zone or (low <= self.close <= high)
-            return (bull_pin_ok or bull_eng_ok) and zone and trend_ok
+            zone = self.zone_index.contains(self.close)
+            return bull_ok and zone and trend_ok
         else:
             pass
 
     def should_short(self) -> bool:
         if self.hp['risk_short'] != 0:
-            bear_pin_ok = cta.pinbar(self.candles, self.hp['sensivity x10'], self.hp['wick']) < 0
-            bear_eng_ok = cta.engulfing(self.candles) < 0
+            bear_ok = cta.pinbar_direction(self.patterns) < 0 or cta.engulfing_direction(self.patterns) < 0
             trend_ok = self.close > self.supertrend.trend
-            zone = False
-            for (low, high) in self.vars['zones']:
-                zone = zone or (low <= self.close <= high)
-            return (bear_pin_ok or bear_eng_ok) and zone and trend_ok
+            zone = self.zone_index.contains(self.close)
+            return bear_ok and zone and trend_ok
         else:
             pass
     
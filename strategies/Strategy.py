@@ -1,22 +1,141 @@
+import json
+import os
+import threading
 from abc import ABC, abstractmethod
-from time import sleep
-from typing import List
+from collections import Counter
+from functools import wraps
+from time import monotonic, perf_counter
+from typing import Callable, List
 
 import numpy as np
-import pydash
 
 import jesse.helpers as jh
+import jesse.indicators as ta
 import jesse.services.logger as logger
 import jesse.services.selectors as selectors
 from jesse import exceptions
 from jesse.enums import sides, trade_types, order_roles
 from jesse.models import CompletedTrade, Order, Route, FuturesExchange, SpotExchange, Position
 from jesse.models.utils import store_completed_trade_into_db, store_order_into_db
-from jesse.services import metrics
 from jesse.services.broker import Broker
 from jesse.store import store
 from jesse.services.cache import cached
-from jesse.services import notifier
+from jesse.services import metrics, notifier
+from custom_indicators.cache import shared
+from custom_indicators.running_metrics import RunningMetrics
+
+
+# route events broadcast to the other strategies, and their handlers
+ROUTE_EVENTS = {
+    'route-open-position': 'on_route_open_position',
+    'route-close-position': 'on_route_close_position',
+    'route-increased-position': 'on_route_increased_position',
+    'route-reduced-position': 'on_route_reduced_position',
+    'route-canceled': 'on_route_canceled',
+}
+
+
+# notified whenever an order changes state, see notify_order_update()
+_order_updates = threading.Condition()
+
+
+def notify_order_update() -> None:
+    """
+    Wakes up the strategies waiting for an order state. Called once an order update
+    is handled, and by Order.cancel() when the exchange confirms a cancellation.
+    """
+    with _order_updates:
+        _order_updates.notify_all()
+
+
+def _notifying_cancel(cancel: Callable) -> Callable:
+    @wraps(cancel)
+    def decorated(*args, **kwargs):
+        try:
+            return cancel(*args, **kwargs)
+        finally:
+            notify_order_update()
+    decorated.notifies_order_update = True
+    return decorated
+
+
+# the live driver cancels the order when the websocket confirms it, which must wake up _check()
+if not getattr(Order.cancel, 'notifies_order_update', False):
+    Order.cancel = _notifying_cancel(Order.cancel)
+
+
+class RunningVwap:
+    """
+    Running sums of qty and qty * price of executed orders, for O(1) average prices
+    """
+
+    def __init__(self) -> None:
+        self.qty = 0
+        self.cost = 0
+
+    def add(self, qty: float, price: float) -> None:
+        self.qty += abs(qty)
+        self.cost += abs(qty) * price
+
+    @property
+    def price(self) -> float:
+        """ the volume weighted average price, None if nothing was executed """
+        return self.cost / self.qty if self.qty else None
+
+
+class StageTimings:
+    """
+    Wall time histograms of the strategy's stages, in power of two buckets of microseconds,
+    and invocation counts of its indicators: the shared_indicator() calls by function name and
+    the reads of the cta.timeframe_cached properties by property name, whether they were
+    computed or served from a cache. Other properties and direct indicator calls are not counted.
+    """
+
+    BUCKETS = 32
+
+    def __init__(self) -> None:
+        # stage -> [count, total seconds, min seconds, max seconds, buckets]
+        self.stages = {}
+        self.indicators = Counter()
+
+    def record(self, stage: str, seconds: float) -> None:
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = [0, 0., seconds, seconds, [0] * self.BUCKETS]
+        h[0] += 1
+        h[1] += seconds
+        if seconds < h[2]:
+            h[2] = seconds
+        elif seconds > h[3]:
+            h[3] = seconds
+        # bucket b holds the durations in [2 ** (b - 1), 2 ** b) microseconds
+        h[4][min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+
+    @staticmethod
+    def _percentile(buckets: list, count: int, q: float) -> float:
+        """ upper bound, in seconds, of the bucket holding the q quantile """
+        rank, seen = q * count, 0
+        for b, n in enumerate(buckets):
+            seen += n
+            if seen >= rank:
+                return 2 ** b / 1e6
+        return 2 ** (len(buckets) - 1) / 1e6
+
+    def summary(self) -> dict:
+        """ JSON serializable timings per stage, sorted by total time, and indicator invocation counts """
+        stages = {}
+        for stage, (count, total, low, high, buckets) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            stages[stage] = {
+                'count': count,
+                'total': total,
+                'mean': total / count,
+                'min': low,
+                'max': high,
+                'p50': self._percentile(buckets, count, 0.5),
+                'p99': self._percentile(buckets, count, 0.99),
+                'buckets': buckets,
+            }
+        return {'stages': stages, 'indicators': dict(self.indicators.most_common())}
 
 
 class Strategy(ABC):
@@ -24,6 +143,34 @@ class Strategy(ABC):
     The parent strategy class which every strategy must extend. It is the heart of the framework!
     """
 
+    # {event: subscribed strategies} of the current run, see _route_event_subscribers()
+    _route_event_table = None
+
+    # live trading: seconds to wait for an order update to be handled, and for a cancellation
+    # to be confirmed, then how often to re-check the order state in case an update was not notified
+    order_update_timeout = 3
+    cancel_timeout = 4
+    order_state_poll_interval = 0.05
+
+    # opt-in wall time of each stage (before, should_long, each filter...) and indicator
+    # invocation counts, queried with self.timings and exported to instrument_path at _terminate
+    instrument = False
+    instrument_path = 'storage/instrumentation'
+
+    # run the filters cheapest and most selective first, from their pass rate and cost so far
+    adaptive_filters = False
+
+    # re-quote policy, off by default: an entry ladder (buy or sell) whose legs have the same count
+    # is only replaced when a price moved by more than requote_ticks ticks (live trading only,
+    # where the price precision is known) and requote_atr times the ATR, or a qty by more than
+    # the requote_qty fraction, and not sooner than requote_interval seconds after its last change.
+    # The stop-loss and take-profit ladders are always replaced when they change
+    requote_ticks = 0
+    requote_atr = 0
+    requote_atr_period = 14
+    requote_qty = 0
+    requote_interval = 0
+
     def __init__(self) -> None:
         self.id = jh.generate_unique_id()
         self.name = None
@@ -49,8 +196,9 @@ class Strategy(ABC):
 
         self._open_position_orders = []
         self._close_position_orders = []
-        self._executed_open_orders = []
-        self._executed_close_orders = []
+        # average prices of the executed entry and exit orders of the current trade
+        self._entry_vwap = RunningVwap()
+        self._exit_vwap = RunningVwap()
 
         self.trade: CompletedTrade = None
         self.trades_count = 0
@@ -61,9 +209,20 @@ class Strategy(ABC):
 
         self.position: Position = None
         self.broker = None
+        # (price_precision, qty_precision) of the route's symbol, see _refresh_precisions()
+        self._precisions = None
 
         self._cached_methods = {}
+        # trades count -> metrics, see metrics
         self._cached_metrics = {}
+        self._bound_indicators = []
+        # the current candle, resolved once per execution, see current_candle
+        self._current_candle = None
+        self._timings = StageTimings() if self.instrument else None
+        # filter name -> [calls, passes, total seconds]
+        self._filters_stats = {}
+        # ladder -> time of its last replacement, see _is_modified()
+        self._requoted_at = {}
 
     def _init_objects(self) -> None:
         """
@@ -73,51 +232,110 @@ class Strategy(ABC):
         """
         self.position = selectors.get_position(self.exchange, self.symbol)
         self.broker = Broker(self.position, self.exchange, self.symbol, self.timeframe)
+        # a new run: the subscribers of the previous one, if it was not terminated, are dropped
+        Strategy._route_event_table = None
+        self._refresh_precisions()
 
         if self.hp is None and len(self.hyperparameters()) > 0:
             self.hp = {}
             for dna in self.hyperparameters():
                 self.hp[dna['name']] = dna['default']
 
+    def _refresh_precisions(self) -> None:
+        """
+        resolves the precisions of the route's symbol, None when the exchange has none for it.
+        Called at _init_objects, and in live trading at each execution until they are known
+        """
+        precisions = selectors.get_exchange(self.exchange).vars.get('precisions', {}).get(self.symbol)
+        if precisions is None:
+            self._precisions = None
+        else:
+            self._precisions = precisions['price_precision'], precisions['qty_precision']
+
     @property
     def _price_precision(self) -> int:
         """
         used when live trading because few exchanges require numbers to have a specific precision
         """
-        return selectors.get_exchange(self.exchange).vars['precisions'][self.symbol]['price_precision']
+        return self._precisions[0]
 
     @property
     def _qty_precision(self) -> int:
         """
         used when live trading because few exchanges require numbers to have a specific precision
         """
-        return selectors.get_exchange(self.exchange).vars['precisions'][self.symbol]['qty_precision']
+        return self._precisions[1]
 
     def _broadcast(self, msg: str) -> None:
-        """Broadcasts the event to all OTHER strategies
+        """Broadcasts the event to the OTHER strategies that override its handler
 
         Arguments:
             msg {str} -- [the message to broadcast]
         """
-        from jesse.routes import router
-
-        for r in router.routes:
+        for strategy in self._route_event_subscribers(msg):
             # skip self
-            if r.strategy.id == self.id:
+            if strategy.id == self.id:
                 continue
 
-            if msg == 'route-open-position':
-                r.strategy.on_route_open_position(self)
-            elif msg == 'route-close-position':
-                r.strategy.on_route_close_position(self)
-            elif msg == 'route-increased-position':
-                r.strategy.on_route_increased_position(self)
-            elif msg == 'route-reduced-position':
-                r.strategy.on_route_reduced_position(self)
-            elif msg == 'route-canceled':
-                r.strategy.on_route_canceled(self)
+            orders = strategy._entry_and_exit_orders
+            getattr(strategy, ROUTE_EVENTS[msg])(self)
+
+            # only the strategies whose handler changed their entry or exit orders, assigned
+            # or modified in place, need to be checked
+            if strategy._entry_and_exit_orders_changed(orders):
+                strategy._detect_and_handle_entry_and_exit_modifications()
 
-            r.strategy._detect_and_handle_entry_and_exit_modifications()
+    @staticmethod
+    def _route_event_subscribers(msg: str) -> list:
+        """
+        the strategies overriding the handler of the event, from a table built at the first
+        broadcast of a run: the routes do not change until the strategies are terminated, or
+        new ones are initiated
+        """
+        if Strategy._route_event_table is None:
+            from jesse.routes import router
+
+            Strategy._route_event_table = {
+                event: [
+                    r.strategy for r in router.routes
+                    if getattr(type(r.strategy), handler) is not getattr(Strategy, handler)
+                ]
+                for event, handler in ROUTE_EVENTS.items()
+            }
+
+        try:
+            return Strategy._route_event_table[msg]
+        except KeyError:
+            raise ValueError(f'Unknown route event: {msg}')
+
+    @property
+    def _entry_and_exit_orders(self) -> tuple:
+        """ copies of buy, sell, stop_loss and take_profit, see _entry_and_exit_orders_changed() """
+        return tuple(self._ladder_snapshot(ladder) for ladder in (self.buy, self.sell, self.stop_loss, self.take_profit))
+
+    @staticmethod
+    def _ladder_snapshot(ladder):
+        if ladder is None:
+            return None
+        try:
+            return np.array(ladder, dtype=float)
+        except (TypeError, ValueError):
+            # an invalid ladder, reported when it is prepared
+            return ladder
+
+    def _entry_and_exit_orders_changed(self, orders: tuple) -> bool:
+        """ whether the entry or exit orders differ from the _entry_and_exit_orders taken before """
+        for new, old in zip((self.buy, self.sell, self.stop_loss, self.take_profit), orders):
+            if new is None or old is None:
+                if new is not old:
+                    return True
+                continue
+            try:
+                if not np.array_equal(np.asarray(new, dtype=float), old):
+                    return True
+            except (TypeError, ValueError):
+                return True
+        return False
 
     def _on_updated_position(self, order: Order) -> None:
         """
@@ -156,15 +374,26 @@ class Strategy(ABC):
             self._on_reduced_position(order)
 
         self._is_handling_updated_order = False
+        notify_order_update()
 
     def filters(self) -> list:
         return []
 
+    def pre_entry_filters(self) -> list:
+        """
+        Filters that do not need the orders (no self.buy, self.average_take_profit...), they run
+        before go_long()/go_short() so that a rejected signal does not pay for the order sizing
+        """
+        return []
+
     def hyperparameters(self) -> list:
         return []
 
     def _execute_long(self) -> None:
-        self.go_long()
+        if not self._execute_filters(self.pre_entry_filters()):
+            return
+
+        self._timed('go_long', self.go_long)
 
         # validation
         if self.buy is None:
@@ -187,26 +416,36 @@ class Strategy(ABC):
             self._prepare_stop_loss()
 
         # filters
-        passed = self._execute_filters()
+        passed = self._execute_filters(self.filters())
         if not passed:
             return
 
         for o in self._buy:
-            # MARKET order
-            if abs(o[1] - self.price) < 0.0001:
-                submitted_order = self.broker.buy_at_market(o[0], order_roles.OPEN_POSITION)
-            # STOP order
-            elif o[1] > self.price:
-                submitted_order = self.broker.start_profit_at(sides.BUY, o[0], o[1], order_roles.OPEN_POSITION)
-            # LIMIT order
-            elif o[1] < self.price:
-                submitted_order = self.broker.buy_at(o[0], o[1], order_roles.OPEN_POSITION)
-            else:
-                raise ValueError(f'Invalid order price: o[1]:{o[1]}, self.price:{self.price}')
-
+            submitted_order = self._submit_open_position_order(sides.BUY, o[0], o[1])
             if submitted_order:
                 self._open_position_orders.append(submitted_order)
 
+    def _submit_open_position_order(self, side: str, qty: float, price: float) -> Order:
+        """
+        Submits an entry order as a MARKET order at the current price, a STOP order
+        beyond it, or a LIMIT order on the other side
+        """
+        # MARKET order
+        if abs(price - self.price) < 0.0001:
+            if side == sides.BUY:
+                return self.broker.buy_at_market(qty, order_roles.OPEN_POSITION)
+            return self.broker.sell_at_market(qty, order_roles.OPEN_POSITION)
+        # STOP order
+        elif (side == sides.BUY and price > self.price) or (side == sides.SELL and price < self.price):
+            return self.broker.start_profit_at(side, qty, price, order_roles.OPEN_POSITION)
+        # LIMIT order
+        elif side == sides.BUY and price < self.price:
+            return self.broker.buy_at(qty, price, order_roles.OPEN_POSITION)
+        elif side == sides.SELL and price > self.price:
+            return self.broker.sell_at(qty, price, order_roles.OPEN_POSITION)
+        else:
+            raise ValueError(f'Invalid order price: price:{price}, self.price:{self.price}')
+
     def _prepare_buy(self, make_copies: bool = True) -> None:
         if type(self.buy) is np.ndarray:
             return
@@ -266,21 +505,14 @@ class Strategy(ABC):
             arr = np.array(arr, dtype=float)
 
             if jh.is_live():
-                # in livetrade mode, we'll need them rounded
-                current_exchange = selectors.get_exchange(self.exchange)
-
-                # skip rounding if the exchange doesn't have values for 'precisions'
-                if 'precisions' not in current_exchange.vars:
+                # in livetrade mode, we'll need them rounded, with the precisions
+                # resolved at _init_objects. Skip rounding if the exchange doesn't have values for 'precisions'
+                if self._precisions is None:
                     return arr
 
-                price_precision = current_exchange.vars['precisions'][self.symbol]['price_precision']
-                qty_precision = current_exchange.vars['precisions'][self.symbol]['qty_precision']
-
-                prices = jh.round_price_for_live_mode(arr[:, 1], price_precision)
-                qtys = jh.round_qty_for_live_mode(arr[:, 0], qty_precision)
-
-                arr[:, 0] = qtys
-                arr[:, 1] = prices
+                price_precision, qty_precision = self._precisions
+                arr[:, 0] = jh.round_qty_for_live_mode(arr[:, 0], qty_precision)
+                arr[:, 1] = jh.round_price_for_live_mode(arr[:, 1], price_precision)
 
             return arr
         except ValueError:
@@ -302,7 +534,10 @@ class Strategy(ABC):
             raise exceptions.InvalidStrategy('self.take_profit must be either a list or a tuple. example: [qty, price]')
 
     def _execute_short(self) -> None:
-        self.go_short()
+        if not self._execute_filters(self.pre_entry_filters()):
+            return
+
+        self._timed('go_short', self.go_short)
 
         # validation
         if self.sell is None:
@@ -321,28 +556,22 @@ class Strategy(ABC):
             self._prepare_stop_loss()
 
         # filters
-        passed = self._execute_filters()
+        passed = self._execute_filters(self.filters())
         if not passed:
             return
 
         for o in self._sell:
-            # MARKET order
-            if abs(o[1] - self.price) < 0.0001:
-                submitted_order = self.broker.sell_at_market(o[0], order_roles.OPEN_POSITION)
-            # STOP order
-            elif o[1] < self.price:
-                submitted_order = self.broker.start_profit_at(sides.SELL, o[0], o[1], order_roles.OPEN_POSITION)
-            # LIMIT order
-            elif o[1] > self.price:
-                submitted_order = self.broker.sell_at(o[0], o[1], order_roles.OPEN_POSITION)
-            else:
-                raise ValueError(f'Invalid order price: o[1]:{o[1]}, self.price:{self.price}')
-
+            submitted_order = self._submit_open_position_order(sides.SELL, o[0], o[1])
             if submitted_order:
                 self._open_position_orders.append(submitted_order)
 
-    def _execute_filters(self) -> bool:
-        for f in self.filters():
+    def _execute_filters(self, filters: list) -> bool:
+        if self.adaptive_filters:
+            filters = sorted(filters, key=self._filter_rank)
+
+        for f in filters:
+            name = getattr(f, '__name__', f)
+            start = perf_counter()
             try:
                 passed = f()
             except TypeError:
@@ -359,14 +588,44 @@ class Strategy(ABC):
                                             "    self.filter_1\n"
                                             "]\n"
                 )
+            seconds = perf_counter() - start
+
+            stats = self._filters_stats.setdefault(name, [0, 0, 0.])
+            stats[0] += 1
+            stats[1] += bool(passed)
+            stats[2] += seconds
+            if self._timings is not None:
+                self._timings.record(f'filter:{name}', seconds)
 
             if not passed:
-                logger.info(f.__name__)
+                if jh.is_debugging():
+                    logger.info(f'{name} did not pass')
                 self._reset()
                 return False
 
         return True
 
+    def _filter_rank(self, f) -> float:
+        """
+        expected cost of the filter per rejected signal, running the filters by increasing
+        rank minimizes the total cost of the pipeline. The unknown filters run first.
+        """
+        stats = self._filters_stats.get(getattr(f, '__name__', f))
+        if stats is None:
+            return 0
+        calls, passes, seconds = stats
+        return (seconds / calls) / max(1 - passes / calls, 1e-9)
+
+    @property
+    def filters_stats(self) -> dict:
+        """
+        Returns the number of calls, the pass rate and the mean cost in seconds of each filter
+        """
+        return {
+            name: {'calls': calls, 'pass_rate': passes / calls, 'mean_cost': seconds / calls}
+            for name, (calls, passes, seconds) in self._filters_stats.items()
+        }
+
     @abstractmethod
     def go_long(self) -> None:
         pass
@@ -408,8 +667,8 @@ class Strategy(ABC):
 
         self._open_position_orders = []
         self._close_position_orders = []
-        self._executed_open_orders = []
-        self._executed_close_orders = []
+        self._entry_vwap = RunningVwap()
+        self._exit_vwap = RunningVwap()
 
         self.increased_count = 0
         self.reduced_count = 0
@@ -447,9 +706,9 @@ class Strategy(ABC):
         pass
 
     def _update_position(self) -> None:
-        self.update_position()
+        self._timed('update_position', self.update_position)
 
-        self._detect_and_handle_entry_and_exit_modifications()
+        self._timed('detect_modifications', self._detect_and_handle_entry_and_exit_modifications)
 
     def _detect_and_handle_entry_and_exit_modifications(self) -> None:
         if self.position.is_close:
@@ -461,116 +720,37 @@ class Strategy(ABC):
                 self._prepare_buy(make_copies=False)
 
                 # if entry has been modified
-                if self._buy is None or self.buy.shape != self._buy.shape or not np.allclose(self.buy, self._buy, rtol = 1e-05, atol = 0):
+                if self._is_modified(self.buy, self._buy, 'buy'):
                     self._buy = self.buy.copy()
-
-                    # cancel orders
-                    for o in self._open_position_orders:
-                        if o.is_active or o.is_queued:
-                            self.broker.cancel_order(o.id)
-                        elif o.is_executed:
-                            self._executed_open_orders.append(o)
-                    self._open_position_orders = []
-                    for o in self._buy:
-                        # MARKET order
-                        if abs(o[1] - self.price) < 0.0001:
-                            submitted_order = self.broker.buy_at_market(o[0], order_roles.OPEN_POSITION)
-                        # STOP order
-                        elif o[1] > self.price:
-                            submitted_order = self.broker.start_profit_at(sides.BUY, o[0], o[1],
-                                                                          order_roles.OPEN_POSITION)
-                        # LIMIT order
-                        elif o[1] < self.price:
-                            submitted_order = self.broker.buy_at(o[0], o[1], order_roles.OPEN_POSITION)
-                        else:
-                            raise ValueError(f'Invalid order price: o[1]:{o[1]}, self.price:{self.price}')
-
-                        if submitted_order:
-                            self._open_position_orders.append(submitted_order)
+                    self._update_open_position_orders(sides.BUY, self._buy)
 
             elif self.is_short and self.sell is not None:
                 # prepare format
                 self._prepare_sell(make_copies=False)
 
                 # if entry has been modified
-                if self._sell is None or self.sell.shape != self._sell.shape or not np.allclose(self.sell, self._sell, rtol = 1e-05, atol = 0):
+                if self._is_modified(self.sell, self._sell, 'sell'):
                     self._sell = self.sell.copy()
-
-                    # cancel orders
-                    for o in self._open_position_orders:
-                        if o.is_active or o.is_queued:
-                            self.broker.cancel_order(o.id)
-                        elif o.is_executed:
-                            self._executed_open_orders.append(o)
-                    self._open_position_orders = []
-                    for o in self._sell:
-                        # MARKET order
-                        if abs(o[1] - self.price) < 0.0001:
-                            submitted_order = self.broker.sell_at_market(o[0], order_roles.OPEN_POSITION)
-                        # STOP order
-                        elif o[1] < self.price:
-                            submitted_order = self.broker.start_profit_at(sides.SELL, o[0], o[1],
-                                                                          order_roles.OPEN_POSITION)
-                        # LIMIT order
-                        elif o[1] > self.price:
-                            submitted_order = self.broker.sell_at(o[0], o[1], order_roles.OPEN_POSITION)
-                        else:
-                            raise ValueError(f'Invalid order price: o[1]:{o[1]}, self.price:{self.price}')
-
-                        if submitted_order:
-                            self._open_position_orders.append(submitted_order)
+                    self._update_open_position_orders(sides.SELL, self._sell)
 
             if self.position.is_open and self.take_profit is not None:
                 self._validate_take_profit()
                 self._prepare_take_profit(False)
 
                 # if _take_profit has been modified
-                if self._take_profit is None or self.take_profit.shape != self._take_profit.shape or not np.allclose(self.take_profit, self._take_profit, rtol = 1e-05, atol = 0):
+                if self._is_modified(self.take_profit, self._take_profit, 'take-profit'):
                     self._take_profit = self.take_profit.copy()
-
-                    # cancel orders
-                    for o in self._close_position_orders:
-                        if o.submitted_via == 'take-profit' and o.is_active or o.is_queued:
-                            self.broker.cancel_order(o.id)
-                        elif o.is_executed:
-                            self._executed_close_orders.append(o)
-                    # clean orders array
-                    self._close_position_orders = [o for o in self._close_position_orders if o.submitted_via != 'take-profit']
-                    for o in self._take_profit:
-                        submitted_order: Order = self.broker.reduce_position_at(
-                            o[0],
-                            o[1],
-                            order_roles.CLOSE_POSITION
-                        )
-                        submitted_order.submitted_via = 'take-profit'
-                        if submitted_order:
-                            self._close_position_orders.append(submitted_order)
+                    self._update_close_position_orders('take-profit', self._take_profit)
 
             if self.position.is_open and self.stop_loss is not None:
                 self._validate_stop_loss()
                 self._prepare_stop_loss(False)
 
                 # if stop_loss has been modified
-                if self._stop_loss is None or self.stop_loss.shape != self._stop_loss.shape or not np.allclose(self.stop_loss, self._stop_loss, rtol = 1e-05, atol = 0):
-                    # prepare format
+                if self._is_modified(self.stop_loss, self._stop_loss, 'stop-loss'):
                     self._stop_loss = self.stop_loss.copy()
+                    self._update_close_position_orders('stop-loss', self._stop_loss)
 
-                    # cancel orders
-                    for o in self._close_position_orders:
-                        if o.submitted_via == 'stop-loss' and o.is_active or o.is_queued:
-                            self.broker.cancel_order(o.id)
-                    # clean orders array
-                    self._close_position_orders = [o for o in self._close_position_orders if o.submitted_via != 'stop-loss']
-                    for o in self._stop_loss:
-                        submitted_order: Order = self.broker.reduce_position_at(
-                            o[0],
-                            o[1],
-                            order_roles.CLOSE_POSITION
-                        )
-                        submitted_order.submitted_via = 'stop-loss'
-                        if submitted_order:
-                            self._close_position_orders.append(submitted_order)
-            
         except TypeError:
             raise exceptions.InvalidStrategy(
                 'Something odd is going on within your strategy causing a TypeError exception. '
@@ -588,6 +768,91 @@ class Strategy(ABC):
             raise exceptions.InvalidStrategy(
                 'stop-loss and take-profit should not be exactly the same. Just use either one of them and it will do.')
 
+    def _is_modified(self, new: np.ndarray, old: np.ndarray, ladder: str) -> bool:
+        """
+        whether the ladder has to be replaced, according to the re-quote policy for the entry ladders
+        """
+        if old is None or new.shape != old.shape:
+            self._requoted_at[ladder] = store.app.time
+            return True
+
+        # an exit must follow the strategy exactly, a lagging stop-loss is a risk
+        entry = ladder in ('buy', 'sell')
+        price_tolerance = np.maximum(self._requote_price_tolerance() if entry else 0, 1e-05 * np.abs(old[:, 1]))
+        qty_tolerance = max(self.requote_qty if entry else 0, 1e-05) * np.abs(old[:, 0])
+        if np.all(np.abs(new[:, 1] - old[:, 1]) <= price_tolerance) and np.all(np.abs(new[:, 0] - old[:, 0]) <= qty_tolerance):
+            return False
+
+        if entry and self.requote_interval and store.app.time - self._requoted_at.get(ladder, -np.inf) < self.requote_interval * 1000:
+            return False
+
+        self._requoted_at[ladder] = store.app.time
+        return True
+
+    def _requote_price_tolerance(self) -> float:
+        tolerance = 0
+        if self.requote_ticks and self._precisions is not None:
+            tolerance = self.requote_ticks * 10 ** -self._price_precision
+        if self.requote_atr:
+            tolerance = max(tolerance, self.requote_atr * self.shared_indicator(ta.atr, self.requote_atr_period))
+        return tolerance
+
+    @staticmethod
+    def _diff_legs(orders: List[Order], legs: np.ndarray) -> tuple:
+        """
+        Matches the active orders of a ladder with its new (qty, price) legs so
+        that only the legs that actually changed are cancelled and submitted.
+        The broker has no amend, so a moved leg is a cancel and a submit.
+
+        :return: (orders to keep, orders to cancel, legs to submit)
+        """
+        remaining = list(legs)
+        keep, cancel = [], []
+        for o in orders:
+            for i, (qty, price) in enumerate(remaining):
+                if np.isclose(abs(o.qty), abs(qty), rtol=1e-05, atol=0) and np.isclose(o.price, price, rtol=1e-05, atol=0):
+                    keep.append(o)
+                    del remaining[i]
+                    break
+            else:
+                cancel.append(o)
+        return keep, cancel, remaining
+
+    def _update_open_position_orders(self, side: str, legs: np.ndarray) -> None:
+        active = []
+        for o in self._open_position_orders:
+            if o.is_active or o.is_queued:
+                active.append(o)
+
+        keep, cancel, submit = self._diff_legs(active, legs)
+        for o in cancel:
+            self.broker.cancel_order(o.id)
+
+        self._open_position_orders = keep
+        for qty, price in submit:
+            submitted_order = self._submit_open_position_order(side, qty, price)
+            if submitted_order:
+                self._open_position_orders.append(submitted_order)
+
+    def _update_close_position_orders(self, submitted_via: str, legs: np.ndarray) -> None:
+        others, active = [], []
+        for o in self._close_position_orders:
+            if o.submitted_via != submitted_via:
+                others.append(o)
+            elif o.is_active or o.is_queued:
+                active.append(o)
+
+        keep, cancel, submit = self._diff_legs(active, legs)
+        for o in cancel:
+            self.broker.cancel_order(o.id)
+
+        self._close_position_orders = others + keep
+        for qty, price in submit:
+            submitted_order: Order = self.broker.reduce_position_at(qty, price, order_roles.CLOSE_POSITION)
+            if submitted_order:
+                submitted_order.submitted_via = submitted_via
+                self._close_position_orders.append(submitted_order)
+
     def update_position(self) -> None:
         pass
 
@@ -601,9 +866,9 @@ class Strategy(ABC):
         if self._is_handling_updated_order:
             logger.info(
                 "Stopped strategy execution at this time because of we're still handling the result "
-                "of an order update. Trying again in 3 seconds..."
+                f"of an order update. Waiting up to {self.order_update_timeout} seconds..."
             )
-            sleep(3)
+            self._wait_for_order_state(lambda: not self._is_handling_updated_order, self.order_update_timeout)
 
         if jh.is_live() and jh.is_debugging():
             logger.info(f'Executing  {self.name}-{self.exchange}-{self.symbol}-{self.timeframe}')
@@ -613,23 +878,18 @@ class Strategy(ABC):
             logger.info('Maximum allowed trades in test-drive mode is reached')
             return
 
-        if len(self._open_position_orders) and self.is_close and self.should_cancel():
+        if len(self._open_position_orders) and self.is_close and self._timed('should_cancel', self.should_cancel):
             self._execute_cancel()
 
             # make sure order cancellation response is received via WS
             if jh.is_live():
-                # sleep a little until cancel is received via WS
-                sleep(0.1)
-                # just in case, sleep some more if necessary
-                for _ in range(20):
-                    if store.orders.count_active_orders(self.exchange, self.symbol) == 0:
-                        break
-
-                    logger.info('sleeping 0.2 more seconds until cancellation is over...')
-                    sleep(0.2)
+                cancelled = self._wait_for_order_state(
+                    lambda: store.orders.count_active_orders(self.exchange, self.symbol) == 0,
+                    self.cancel_timeout
+                )
 
                 # If it's still not cancelled, something is wrong. Handle cancellation failure
-                if store.orders.count_active_orders(self.exchange, self.symbol) != 0:
+                if not cancelled:
                     raise exceptions.ExchangeNotResponding(
                         'The exchange did not respond as expected for order cancellation'
                     )
@@ -641,17 +901,37 @@ class Strategy(ABC):
             store.orders.execute_pending_market_orders()
 
         if self.position.is_close and self._open_position_orders == []:
-            should_short = self.should_short()
-            should_long = self.should_long()
+            should_short = self._timed('should_short', self.should_short)
+            should_long = self._timed('should_long', self.should_long)
             # validation
             if should_short and should_long:
                 raise exceptions.ConflictingRules(
                     'should_short and should_long should not be true at the same time.'
                 )
             if should_long:
-                self._execute_long()
+                self._timed('execute_long', self._execute_long)
             elif should_short:
-                self._execute_short()
+                self._timed('execute_short', self._execute_short)
+
+    def _wait_for_order_state(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        """
+        Blocks until predicate() is true, waking up as soon as an order update is notified
+
+        Arguments:
+            predicate {Callable[[], bool]} -- [the expected order state]
+            timeout {float} -- [seconds to wait at most]
+
+        Returns:
+            bool -- [False if the order state was not reached in time]
+        """
+        deadline = monotonic() + timeout
+        with _order_updates:
+            while not predicate():
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                _order_updates.wait(min(remaining, self.order_state_poll_interval))
+        return True
 
     def _on_open_position(self, order: Order) -> None:
         self.increased_count = 1
@@ -815,15 +1095,54 @@ class Strategy(ABC):
             return
 
         self._is_executing = True
+        # the exchange may not have sent its market info yet when the route was initiated
+        if self._precisions is None and jh.is_live():
+            self._refresh_precisions()
+        self._current_candle = self._current_candle_view()
+        start = perf_counter() if self._timings is not None else None
 
-        self.before()
-        self._check()
-        self.after()
-        self._clear_cached_methods()
+        try:
+            self._timed('bound_indicators', self._update_bound_indicators)
+
+            self._timed('before', self.before)
+            self._timed('check', self._check)
+            self._timed('after', self.after)
+            self._clear_cached_methods()
+
+            if start is not None:
+                self._timings.record('execute', perf_counter() - start)
+        finally:
+            # never served after the execution, even a failed one
+            self._current_candle = None
 
         self._is_executing = False
         self.index += 1
 
+    def _timed(self, stage: str, func: Callable, *args):
+        """ calls func(*args), recording its wall time under stage when the strategy is instrumented """
+        if self._timings is None:
+            return func(*args)
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._timings.record(stage, perf_counter() - start)
+
+    @property
+    def timings(self) -> dict:
+        """
+        Returns the timings of the strategy's stages and the invocation counts of
+        its indicators so far, None if the strategy is not instrumented
+        """
+        return None if self._timings is None else self._timings.summary()
+
+    def _export_timings(self) -> None:
+        os.makedirs(self.instrument_path, exist_ok=True)
+        path = os.path.join(self.instrument_path, f'{self.name}-{self.exchange}-{self.symbol}-{self.timeframe}.json')
+        with open(path, 'w') as f:
+            json.dump(self.timings, f, indent=2)
+        logger.info(f'Stage timings of {self.name} exported to {path}')
+
     def _terminate(self) -> None:
         """
         Optional for executing code after completion of a backTest.
@@ -834,6 +1153,11 @@ class Strategy(ABC):
             logger.info("Terminating strategy...")
 
         self.terminate()
+        # releases the strategies of this backtest, the next one builds its own table
+        Strategy._route_event_table = None
+
+        if self._timings is not None:
+            self._export_timings()
 
         self._detect_and_handle_entry_and_exit_modifications()
 
@@ -873,6 +1197,26 @@ class Strategy(ABC):
         """
         return []
 
+    def bind_indicator(self, indicator):
+        """
+        Binds a streaming indicator (see custom_indicators.streaming) to the route: it is
+        warmed up with the route's candles on the first execution, then updated with
+        the current candle before every call to self.before()
+
+        :param indicator: StreamingIndicator
+
+        :return: StreamingIndicator
+        """
+        self._bound_indicators.append(indicator)
+        return indicator
+
+    def _update_bound_indicators(self) -> None:
+        for indicator in self._bound_indicators:
+            if indicator.count == 0:
+                indicator.warmup(self.candles)
+            else:
+                indicator.update(self.current_candle)
+
     def _clear_cached_methods(self) -> None:
         for m in self._cached_methods.values():
             m.cache_clear()
@@ -880,11 +1224,18 @@ class Strategy(ABC):
     @property
     def current_candle(self) -> np.ndarray:
         """
-        Returns current trading candle
+        Returns current trading candle, as a read-only view resolved once per execution
 
         :return: np.ndarray
         """
-        return store.candles.get_current_candle(self.exchange, self.symbol, self.timeframe).copy()
+        if self._current_candle is not None:
+            return self._current_candle
+        return self._current_candle_view()
+
+    def _current_candle_view(self) -> np.ndarray:
+        candle = store.candles.get_current_candle(self.exchange, self.symbol, self.timeframe).view()
+        candle.flags.writeable = False
+        return candle
 
     @property
     def open(self) -> float:
@@ -957,6 +1308,23 @@ class Strategy(ABC):
         """
         return store.candles.get_candles(exchange, symbol, timeframe)
 
+    def shared_indicator(self, func, *args, timeframe: str = None, **kwargs):
+        """
+        Calls func(candles, *args, **kwargs) on the candles of the route, or of another timeframe
+        of the same exchange and symbol, through the process-wide indicator cache. Every route
+        and property asking for the same computation on the same candle shares its result.
+
+        :param func: callable
+        :param timeframe: str
+
+        :return: the result of func, which must not be modified in place
+        """
+        timeframe = timeframe or self.timeframe
+        if self._timings is not None:
+            self._timings.indicators[getattr(func, '__name__', repr(func))] += 1
+        candles = self.get_candles(self.exchange, self.symbol, timeframe)
+        return shared(self.exchange, self.symbol, timeframe, candles, func, *args, **kwargs)
+
     @property
     def orders(self) -> List[Order]:
         """
@@ -981,14 +1349,40 @@ class Strategy(ABC):
     @property
     def metrics(self) -> dict:
         """
-        Returns all the metrics of the strategy.
+        Returns all the metrics of the strategy: jesse's, computed again only after a trade
+        closed, along with the per-trade trade_* metrics of running_metrics
         """
         if self.trades_count not in self._cached_metrics:
-            self._cached_metrics[self.trades_count] = metrics.trades(
-                store.completed_trades.trades, store.app.daily_balance, final=False
-            )
+            per_trade = {k: v for k, v in self.running_metrics.items() if k.startswith('trade_')}
+            self._cached_metrics[self.trades_count] = {
+                **metrics.trades(store.completed_trades.trades, store.app.daily_balance, final=False),
+                **per_trade,
+            }
         return self._cached_metrics[self.trades_count]
 
+    @property
+    def running_metrics(self) -> dict:
+        """
+        The metrics of the completed trades that are updated in O(1) as each trade closes,
+        cheap enough to be read on every bar, see RunningMetrics
+        """
+        return self._init_running_metrics().metrics
+
+    def _init_running_metrics(self) -> RunningMetrics:
+        """
+        the accumulator shared by all the routes, kept along the completed trades so that it
+        is reset with them. Created with the starting balance of all the exchanges, like
+        jesse's metrics, and the trades completed so far, which are replayed once.
+        """
+        running = getattr(store.completed_trades, 'running_metrics', None)
+        if running is None:
+            starting_balance = sum(e.starting_assets[jh.app_currency()] for e in store.exchanges.storage.values())
+            running = RunningMetrics(starting_balance)
+            for t in store.completed_trades.trades:
+                running.add(t)
+            store.completed_trades.running_metrics = running
+        return running
+
     @property
     def time(self) -> int:
         """returns the current time"""
@@ -1039,49 +1433,25 @@ class Strategy(ABC):
             self.trade.qty = order.qty
             self.trade.opened_at = jh.now_to_timestamp()
             self.trade.entry_candle_timestamp = self.current_candle[0]
+            self._entry_vwap = RunningVwap()
+            self._exit_vwap = RunningVwap()
+            self._add_to_vwap(order)
         elif role in [order_roles.INCREASE_POSITION, order_roles.REDUCE_POSITION]:
             self.trade.orders.append(order)
             self.trade.qty += order.qty
+            self._add_to_vwap(order)
         elif role == order_roles.CLOSE_POSITION:
             self.trade.exit_candle_timestamp = self.current_candle[0]
             self.trade.orders.append(order)
 
-            # calculate average entry_price price
-            sum_price = 0
-            sum_qty = 0
-            for trade_order in self.trade.orders:
-                if not trade_order.is_executed:
-                    continue
-
-                if jh.side_to_type(trade_order.side) != self.trade.type:
-                    continue
-
-                sum_qty += abs(trade_order.qty)
-                sum_price += abs(trade_order.qty) * trade_order.price
-            self.trade.entry_price = sum_price / sum_qty
-
-            # calculate average exit_price
-            sum_price = 0
-            sum_qty = 0
-            for trade_order in self.trade.orders:
-                if not trade_order.is_executed:
-                    continue
-
-                if jh.side_to_type(trade_order.side) == self.trade.type:
-                    continue
-
-                sum_qty += abs(trade_order.qty)
-                sum_price += abs(trade_order.qty) * trade_order.price
-
-            self.trade.exit_price = sum_price / sum_qty
-
+            self._add_to_vwap(order)
+            self.trade.entry_price = self._entry_vwap.price
+            self.trade.exit_price = self._exit_vwap.price
             self.trade.closed_at = jh.now_to_timestamp()
-            self.trade.qty = pydash.sum_by(
-                filter(lambda o: o.side == jh.type_to_side(self.trade.type), self.trade.orders),
-                lambda o: abs(o.qty)
-            )
+            self.trade.qty = self._entry_vwap.qty
 
             store.completed_trades.add_trade(self.trade)
+            self._init_running_metrics().add(self.trade)
             if jh.is_livetrading():
                 store_completed_trade_into_db(self.trade)
             self.trade = None
@@ -1089,6 +1459,11 @@ class Strategy(ABC):
         if jh.is_livetrading():
             store_order_into_db(order)
 
+    def _add_to_vwap(self, order: Order) -> None:
+        """ adds the executed order to the entry or exit average price of the current trade """
+        vwap = self._entry_vwap if jh.side_to_type(order.side) == self.trade.type else self._exit_vwap
+        vwap.add(order.qty, order.price)
+
 
     @property
     def is_long(self) -> bool:
@@ -1138,23 +1513,13 @@ class Strategy(ABC):
 
         return (np.abs(arr[:, 0] * arr[:, 1])).sum() / np.abs(arr[:, 0]).sum()
     
-    @property    
+    @property
     def average_open_price(self) -> float:
-        executed = [[o.qty, o.price] for o in self._executed_open_orders] + [[o.qty, o.price] for o in self._open_position_orders if o.is_executed]
-        arr = self._convert_to_numpy_array(executed, 'self.average_open_price')
-        if len(arr.shape) != 2:
-            return None
-        else:
-            return (np.abs(arr[:, 0] * arr[:, 1])).sum() / np.abs(arr[:, 0]).sum()
-    
+        return self._entry_vwap.price
+
     @property
     def average_close_price(self) -> float:
-        executed = [[o.qty, o.price] for o in self._executed_close_orders] + [[o.qty, o.price] for o in self._close_position_orders if o.is_executed]
-        arr = self._convert_to_numpy_array(executed, 'average_close_price')
-        if len(arr.shape) != 2:
-            return None
-        else:
-            return (np.abs(arr[:, 0] * arr[:, 1])).sum() / np.abs(arr[:, 0]).sum()
+        return self._exit_vwap.price
 
     def liquidate(self) -> None:
         """
@@ -26,7 +26,7 @@ from jesse.strategies import Strategy
 import jesse.indicators as ta
 from jesse import utils
 import custom_indicators as cta
-from jesse.helpers import get_candle_source
+import numpy as np
 
 class SuperDuperSuperTrend(Strategy):
     
@@ -61,22 +61,23 @@ class SuperDuperSuperTrend(Strategy):
     '''
     
     @property
+    @cta.timeframe_cached(lambda self: utils.anchor_timeframe(self.timeframe))
     def anchor_adx(self):
-        return ta.adx(self.anchor_candles, self.hp['adx_period'])
+        return self.shared_indicator(ta.adx, self.hp['adx_period'], timeframe = utils.anchor_timeframe(self.timeframe))
     
     @property
     def atr(self):
-        return ta.atr(self.candles, self.hp['atr_period'])
+        return self.shared_indicator(ta.atr, self.hp['atr_period'])
 
     @property
     def ma(self):
-        ma = ta.ma(self.candles, self.hp['ma_period'], self.hp['ma_type'], sequential = True)
+        ma = self.shared_indicator(ta.ma, self.hp['ma_period'], self.hp['ma_type'], sequential = True)
         trend = cta.deriv(ma).first
         return (ma[-1], trend)
     
     @property
     def supertrend(self):
-        return ta.supertrend(self.candles, self.hp['st_atr'], self.hp['st_period x6'] / 6.)
+        return self.shared_indicator(ta.supertrend, self.hp['st_atr'], self.hp['st_period x6'] / 6.)
     
     '''
     Filters
@@ -84,10 +85,10 @@ class SuperDuperSuperTrend(Strategy):
     
     def filter_sr(self):
         if self.average_take_profit > self.average_entry_price:
-            resistance = cta.high(get_candle_source(self.anchor_candles, 'close'), 12, -2)
+            resistance = self.shared_indicator(cta.high, 12, -2, 'close', timeframe = utils.anchor_timeframe(self.timeframe))
             return self.average_take_profit < resistance - self.atr or self.average_entry_price > resistance + self.atr
         else:
-            support = cta.low(get_candle_source(self.anchor_candles, 'close'), 12, -2)
+            support = self.shared_indicator(cta.low, 12, -2, 'close', timeframe = utils.anchor_timeframe(self.timeframe))
             return self.average_take_profit > support + self.atr or self.average_entry_price < support - self.atr
     
     def filter_pnl(self):
@@ -97,9 +98,13 @@ class SuperDuperSuperTrend(Strategy):
     def filter_adx(self):
         return self.anchor_adx > self.hp['adx_min']
     
+    def pre_entry_filters(self):
+        return [
+            self.filter_adx
+        ]
+
     def filters(self):
         return [
-            self.filter_adx,
             self.filter_pnl,
             self.filter_sr
         ]
@@ -164,3 +169,32 @@ class SuperDuperSuperTrend(Strategy):
         
     def on_reduced_position(self, order):
         pass  
+
+    '''
+    Vectorized
+    '''
+
+    def vectorized_signals(self, candles):
+        """
+        The entries and exits of the strategy on the route's candles as arrays, for cta.vectorized_backtest.
+        filter_adx and filter_sr work on the anchor timeframe and are not applied.
+        """
+        hp = self.hp or {p['name']: p['default'] for p in self.hyperparameters()}
+        close = candles[:, 2]
+        supertrend = ta.supertrend(candles, hp['st_atr'], hp['st_period x6'] / 6., sequential = True)
+        ma = ta.ma(candles, hp['ma_period'], hp['ma_type'], sequential = True)
+        slope = cta.deriv(ma, sequential = True).first
+
+        long = (hp['risk_long'] != 0) & (slope > 0.1 / 100) & (close > supertrend.trend) & (close > ma)
+        short = (hp['risk_short'] != 0) & (slope < - 0.1 / 100) & (close < supertrend.trend) & (close < ma)
+        tp = close + (close - supertrend.trend) * hp['r:r x6'] / 6
+        pnl_ok = np.abs(tp - close) / close * 100 > hp['pnl_min']
+
+        return {
+            'signal': np.where(long & pnl_ok, 1, 0) - np.where(short & pnl_ok, 1, 0),
+            'stop': supertrend.trend,
+            'take_profit': tp,
+            'tp_qty': hp['tp'] / 100,
+            'exit': supertrend.changed.astype(bool),
+            'risk': np.where(long, hp['risk_long'], hp['risk_short']),
+        }
@@ -1,6 +1,7 @@
 from jesse.strategies import Strategy
 import jesse.indicators as ta
 from jesse import utils
+import custom_indicators as cta
 
 
 class TripleSupertrendTF(Strategy):
@@ -43,15 +44,17 @@ class TripleSupertrendTF(Strategy):
 
     @property
     def st(self):
-        return ta.supertrend(self.candles, self.hp['st_atr'], self.hp['st x6'] / 6.)
+        return self.shared_indicator(ta.supertrend, self.hp['st_atr'], self.hp['st x6'] / 6.)
 
     @property
+    @cta.timeframe_cached(lambda self: utils.anchor_timeframe(self.timeframe))
     def anchor_st(self):
-        return ta.supertrend(self.anchor_candles, self.hp['st_atr'], self.hp['anchor_st x6'] / 6.)
+        return self.shared_indicator(ta.supertrend, self.hp['st_atr'], self.hp['anchor_st x6'] / 6., timeframe = utils.anchor_timeframe(self.timeframe))
 
     @property
+    @cta.timeframe_cached(lambda self: utils.anchor_timeframe(utils.anchor_timeframe(self.timeframe)))
     def macro_st(self):
-        return ta.supertrend(self.macro_candles, self.hp['st_atr'], self.hp['macro_st x6'] / 6.)
+        return self.shared_indicator(ta.supertrend, self.hp['st_atr'], self.hp['macro_st x6'] / 6., timeframe = utils.anchor_timeframe(utils.anchor_timeframe(self.timeframe)))
 
     '''
     Filters
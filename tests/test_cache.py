@@ -0,0 +1,64 @@
+import numpy as np
+
+from custom_indicators.cache import indicator_cache, shared, timeframe_cached
+from custom_indicators.timeframes import aggregate
+
+
+class FakeStrategy:
+    """ serves the 4h candles of the first bars of 1h candles, the last 4h candle being formed """
+
+    exchange = 'Binance'
+    symbol = 'BTC-USDT'
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.bars = 0
+        self.computations = 0
+
+    def get_candles(self, exchange, symbol, timeframe):
+        return aggregate(self.candles[:self.bars], timeframe)
+
+    def anchor_close_mean(self):
+        self.computations += 1
+        return self.get_candles(self.exchange, self.symbol, '4h')[:, 2].mean()
+
+    cached_anchor_close_mean = property(timeframe_cached('4h')(anchor_close_mean))
+
+
+def test_timeframe_cached_matches_uncached_bar_by_bar():
+    rng = np.random.default_rng(0)
+    n = 200
+    close = 100 + rng.standard_normal(n).cumsum()
+    candles = np.column_stack((np.arange(n) * 3_600_000., close, close, close + 1, close - 1, np.ones(n)))
+    strategy = FakeStrategy(candles)
+
+    for bar in range(1, n + 1):
+        strategy.bars = bar
+        expected = strategy.anchor_close_mean()
+        assert strategy.cached_anchor_close_mean == expected
+        assert strategy.cached_anchor_close_mean == expected
+
+
+def test_timeframe_cached_computes_once_per_candles():
+    candles = np.column_stack((np.arange(8) * 3_600_000., np.ones((8, 5))))
+    strategy = FakeStrategy(candles)
+    strategy.bars = 5
+
+    for _ in range(3):
+        strategy.cached_anchor_close_mean
+    assert strategy.computations == 1
+
+
+def test_shared_evicts_the_results_of_the_previous_candles():
+    indicator_cache.clear()
+    candles = np.column_stack((np.arange(10) * 60_000., np.ones((10, 5))))
+    mean = lambda c, column: c[:, column].mean()
+
+    for bar in range(1, 11):
+        for column in (1, 2):
+            shared('Binance', 'BTC-USDT', '1m', candles[:bar], mean, column)
+            shared('Binance', 'ETH-USDT', '1m', candles[:bar], mean, column)
+    assert indicator_cache.info().currsize == 4
+
+    shared('Binance', 'BTC-USDT', '1m', candles, mean, 1)
+    assert indicator_cache.info().hits == 1
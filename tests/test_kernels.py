@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from custom_indicators import kernels
+
+CASES = kernels.parity_cases(n=3000)
+
+
+@pytest.mark.parametrize('backend', kernels.BACKENDS)
+@pytest.mark.parametrize('name', list(CASES))
+def test_backend_matches_numpy_reference(name, backend):
+    if backend == 'numba' and kernels.numba is None:
+        pytest.skip('numba is not installed')
+    kernel, args = CASES[name]
+    kernels.compare_backends(kernel, args, backend)
+
+
+@pytest.mark.parametrize('start, future', [(0, 0), (-20, 0), (-12, -2), (-5, 3), (-7, -7)])
+@pytest.mark.parametrize('is_max', [True, False])
+def test_numpy_rolling_extremum_matches_loop(start, future, is_max):
+    rng = np.random.default_rng(1)
+    array = rng.normal(0, 1, 500)
+    n = len(array)
+
+    expected = []
+    for t in range(n):
+        window = [array[i] if 0 <= i < n else 0 for i in range(t + start, t + future + 1)]
+        expected.append(max(window) if is_max else min(window))
+
+    np.testing.assert_allclose(kernels._numpy_rolling_extremum(array, start, future, is_max), expected)
+
+
+@pytest.mark.parametrize('range_down, range_up', [(0, 10), (1, 12), (3, 50), (5, 5)])
+def test_numpy_last_signal_matches_loop(range_down, range_up):
+    rng = np.random.default_rng(2)
+    osc = rng.normal(0, 1, 500)
+    signal = rng.random(500) < 0.05
+
+    expected = np.full((2, 500), np.nan)
+    for t in range(range_down, 500):
+        last = max((i for i in range(t - range_down + 1) if signal[i]), default=None)
+        if last is not None and t - last < range_up:
+            expected[:, t] = t - last, osc[last]
+
+    np.testing.assert_allclose(kernels._numpy_last_signal(osc, signal, range_down, range_up), expected)
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from custom_indicators.vectorized_backtest import TRADE_DTYPE, metrics, vectorized_backtest
+
+
+def reference_backtest(candles, signal, stop, take_profit, tp_qty, exit, qty, fee_rate):
+    """ bar by bar engine: (closed trades, open trade or None) as tuples of the TRADE_DTYPE fields """
+    n = len(candles)
+    close, high, low = candles[:, 2], candles[:, 3], candles[:, 4]
+    trades, position = [], None
+
+    def result(p, end, end_price):
+        size = qty
+        filled = sum(tp_qty[k] for k in p['filled'])
+        remaining = max(1 - filled, 0)
+        exit_price = (sum(p['tps'][k] * tp_qty[k] for k in p['filled']) + remaining * end_price) / (filled + remaining)
+        fee = fee_rate * size * (p['entry'] + exit_price)
+        pnl = p['direction'] * size * (exit_price - p['entry']) - fee
+        return p['index'], end, p['direction'], size, p['entry'], exit_price, fee, pnl
+
+    for t in range(n):
+        if position is not None:
+            long = position['direction'] > 0
+            if (low[t] <= position['stop']) if long else (high[t] >= position['stop']):
+                trades.append(result(position, t, position['stop']))
+                position = None
+            else:
+                for k, tp in enumerate(position['tps']):
+                    if k not in position['filled'] and not np.isnan(tp) and ((high[t] >= tp) if long else (low[t] <= tp)):
+                        position['filled'].append(k)
+                if 1 - sum(tp_qty[k] for k in position['filled']) <= 1e-12:
+                    trades.append(result(position, t, close[t]))
+                    position = None
+                elif exit[t]:
+                    trades.append(result(position, t, close[t]))
+                    position = None
+
+        if position is None and signal[t]:
+            direction = int(np.sign(signal[t]))
+            entry = close[t]
+            if (stop[t] < entry) if direction > 0 else (stop[t] > entry):
+                tps = [tp if ((tp > entry) if direction > 0 else (tp < entry)) else np.nan for tp in take_profit[t]]
+                position = {'index': t, 'direction': direction, 'entry': entry, 'stop': stop[t], 'tps': tps, 'filled': []}
+
+    open_trade = None if position is None else (position['index'], -1) + result(position, n, close[-1])[2:]
+    return trades, open_trade
+
+
+def random_case(rng, n):
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open, close) * (1 + np.abs(rng.normal(0, 0.005, n)))
+    low = np.minimum(open, close) * (1 - np.abs(rng.normal(0, 0.005, n)))
+    candles = np.column_stack((np.arange(n) * 60_000., open, close, high, low, np.ones(n)))
+
+    signal = rng.choice([-1, 0, 1], n, p=[0.1, 0.8, 0.1])
+    # some stops on the wrong side, rejected like the engine does
+    stop = close * (1 - signal * rng.uniform(-0.005, 0.03, n))
+    take_profit = close[:, None] * (1 + signal[:, None] * rng.uniform(-0.005, 0.04, (n, 2)))
+    take_profit[rng.random((n, 2)) < 0.2] = np.nan
+    exit = rng.random(n) < 0.05
+    return candles, signal, stop, take_profit, exit
+
+
+@pytest.mark.parametrize('tp_qty', [[0.5, 0.5], [0.3, 0.3]])
+def test_matches_bar_by_bar_reference(tp_qty):
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(2, 60))
+        candles, signal, stop, take_profit, exit = random_case(rng, n)
+        # a signal on the last candle opens a position that is still open at the end
+        signal[-1] = rng.choice([-1, 1])
+
+        result = vectorized_backtest(candles, signal, stop, take_profit, tp_qty=tp_qty, exit=exit, qty=2., fee_rate=0.001)
+        trades, open_trade = reference_backtest(candles, signal, stop, take_profit, np.array(tp_qty), exit, 2., 0.001)
+
+        assert len(result.trades) == len(trades)
+        for vectorized, expected in zip(result.trades, trades):
+            np.testing.assert_allclose(vectorized.tolist(), expected)
+        assert (result.open_trade is None) == (open_trade is None)
+        if open_trade is not None:
+            np.testing.assert_allclose(result.open_trade.tolist(), open_trade)
+
+
+def test_signal_on_the_last_candle_is_an_open_trade():
+    candles = np.column_stack((np.arange(3) * 60_000., np.full((3, 4), 100.), np.ones(3)))
+    result = vectorized_backtest(candles, [0, 0, 1], stop=90., fee_rate=0.001)
+
+    assert len(result.trades) == 0
+    assert result.open_trade['entry_index'] == 2
+    assert result.open_trade['exit_index'] == -1
+
+
+def test_metrics_count_break_even_trades_like_jesse():
+    trades = np.array([(0, 1, 1, 1., 100., 110., 0., 10.), (2, 3, 1, 1., 100., 100., 0., 0.), (4, 5, -1, 1., 100., 105., 0., -5.)],
+                      dtype=TRADE_DTYPE)
+    result = metrics(trades, 1000)
+
+    assert result['total_winning_trades'] == 1
+    assert result['total_losing_trades'] == 1
+    assert result['win_rate'] == 0.5
+    assert result['gross_loss'] == -5
+    assert 'trade_sharpe_ratio' in result and 'sharpe_ratio' not in result